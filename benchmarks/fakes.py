@@ -0,0 +1,55 @@
+import sys
+import types
+import shutil
+from pathlib import Path
+
+try:
+    from python_src.upload_to_cloud import CloudUploader
+except ImportError:
+    # The fakes never reach the cloud SDKs; stub them when they are not installed
+    google = sys.modules.setdefault('google', types.ModuleType('google'))
+    cloud = sys.modules.setdefault('google.cloud', types.ModuleType('google.cloud'))
+    google.cloud = cloud
+    for name in ('storage', 'vision'):
+        module = sys.modules.setdefault(f'google.cloud.{name}', types.ModuleType(f'google.cloud.{name}'))
+        setattr(cloud, name, module)
+    from python_src.upload_to_cloud import CloudUploader
+
+
+class FakeBlob:
+    """Stand-in for `google.cloud.storage.Blob` that writes to local disk."""
+
+    def __init__(self, root: Path, name: str):
+        self.path = root / name
+
+    def upload_from_filename(self, filename: str):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(filename, self.path)
+
+    def upload_from_string(self, data, content_type: str = None):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self.path.write_bytes(data)
+
+
+class FakeBucket:
+    def __init__(self, root: Path):
+        self.root = root
+
+    def blob(self, name: str) -> FakeBlob:
+        return FakeBlob(self.root, name)
+
+
+class FakeCloudUploader(CloudUploader):
+    """CloudUploader whose bucket is a local directory."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        super().__init__()
+        self.bucket_name = "benchmark-bucket"
+
+    def setup_clients(self):
+        self.storage_client = None
+        self.vision_client = None
+        self.bucket = FakeBucket(self.root)
@@ -0,0 +1,152 @@
+import io
+import json
+import random
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+CATEGORIES = ["cameras", "clothing", "watches", "electronics", "collectibles",
+              "toys", "books", "jewelry", "sporting goods", "home"]
+BRANDS = ["Canon", "Nikon", "Levi's", "Rolex", "Sony", "Lego", "Penguin",
+          "Tiffany", "Wilson", "Dyson"]
+ADJECTIVES = ["vintage", "new", "used", "rare", "classic", "premium", "refurbished",
+              "limited", "original", "genuine"]
+NOUNS = ["camera", "lens", "jacket", "watch", "headphones", "figure", "novel",
+         "necklace", "racket", "vacuum"]
+CONDITIONS = ["New", "Used", "Refurbished", "For parts"]
+
+# Named scales accepted by the benchmark runner
+SCALES = {"1k": 1_000, "100k": 100_000, "1M": 1_000_000}
+
+
+def make_listing(rng: random.Random, item_id: int) -> Dict:
+    """One raw listing as produced by the scraper."""
+    words = [rng.choice(ADJECTIVES), rng.choice(BRANDS), rng.choice(NOUNS)]
+    title = ' '.join(words).title()
+    return {
+        "id": item_id,
+        "title": title,
+        "price": round(rng.uniform(1, 2000), 2),
+        "condition": rng.choice(CONDITIONS),
+        "category": rng.choice(CATEGORIES),
+        "brand": words[1],
+        "description": ' '.join(rng.choice(ADJECTIVES + NOUNS) for _ in range(rng.randint(20, 80))),
+        "url": f"https://www.ebay.com/itm/{item_id}",
+        "image_url": f"https://i.ebayimg.com/images/{item_id}.jpg",
+    }
+
+
+def generate_listings(path: Path, count: int, seed: int = 0) -> Path:
+    """Write `count` raw listings as the JSON array DatasetCreator reads."""
+    rng = random.Random(seed)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        f.write('[')
+        for item_id in range(1, count + 1):
+            if item_id > 1:
+                f.write(',')
+            json.dump(make_listing(rng, item_id), f)
+        f.write(']')
+    return path
+
+
+def generate_images(directory: Path, count: int, size: int = 256, seed: int = 0) -> List[Path]:
+    """Write `count` random JPEG images."""
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = directory / f"item_{i + 1}.jpg"
+        if not path.exists():
+            # Smooth gradients plus noise compress like real photos, unlike pure noise
+            base = np.linspace(0, 255, size, dtype=np.float32)
+            pixels = (base[None, :, None] + rng.normal(0, 25, (size, size, 3))).clip(0, 255)
+            buffer = io.BytesIO()
+            Image.fromarray(pixels.astype(np.uint8)).save(buffer, format="JPEG", quality=85)
+            path.write_bytes(buffer.getvalue())
+        paths.append(path)
+    return paths
+
+
+def generate_database(path: Path, count: int, seed: int = 0, batch_size: int = 10_000) -> Path:
+    """Create a SQLite database with the pipeline's tables and `count` items.
+
+    Uses the schema from push_to_database.lua plus the columns the dashboard
+    and report queries read (`items.category`, `seo_metrics`).
+    """
+    rng = random.Random(seed)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        path.unlink()
+
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        PRAGMA journal_mode = OFF;
+        PRAGMA synchronous = OFF;
+        CREATE TABLE items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            price REAL,
+            url TEXT UNIQUE,
+            image_url TEXT,
+            condition TEXT,
+            category TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE analysis (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            item_id INTEGER,
+            features TEXT,
+            objects TEXT,
+            colors TEXT,
+            quality_score REAL
+        );
+        CREATE TABLE seo (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            item_id INTEGER,
+            description TEXT,
+            keywords TEXT,
+            metadata TEXT
+        );
+        CREATE TABLE seo_metrics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            item_id INTEGER,
+            quality_score REAL,
+            click_through_rate REAL
+        );
+    """)
+
+    for start in range(1, count + 1, batch_size):
+        stop = min(start + batch_size, count + 1)
+        items, analysis, seo, seo_metrics = [], [], [], []
+        for item_id in range(start, stop):
+            listing = make_listing(rng, item_id)
+            timestamp = datetime(2024, 1, 1) + timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+            items.append((item_id, listing["title"], listing["price"], listing["url"],
+                          listing["image_url"], listing["condition"], listing["category"],
+                          timestamp.strftime("%Y-%m-%d %H:%M:%S")))
+            quality = round(rng.uniform(0, 1), 3)
+            analysis.append((item_id, json.dumps({"brand": listing["brand"]}), "[]", "[]", quality))
+            keywords = listing["title"].lower().split() + [listing["category"]]
+            seo.append((item_id, listing["description"][:160], json.dumps(keywords),
+                        json.dumps({"category": listing["category"]})))
+            seo_metrics.append((item_id, quality * 100, round(rng.uniform(0, 10), 2)))
+
+        conn.executemany(
+            "INSERT INTO items (id, title, price, url, image_url, condition, category, timestamp) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", items)
+        conn.executemany(
+            "INSERT INTO analysis (item_id, features, objects, colors, quality_score) "
+            "VALUES (?, ?, ?, ?, ?)", analysis)
+        conn.executemany(
+            "INSERT INTO seo (item_id, description, keywords, metadata) VALUES (?, ?, ?, ?)", seo)
+        conn.executemany(
+            "INSERT INTO seo_metrics (item_id, quality_score, click_through_rate) "
+            "VALUES (?, ?, ?)", seo_metrics)
+    conn.commit()
+    conn.close()
+    return path
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Run the pipeline benchmarks and compare results.
+
+    python -m benchmarks.run --scale 1k --output results.json
+    python -m benchmarks.run --scale 1k --compare baseline.json
+    python -m benchmarks.run --compare baseline.json --results results.json
+"""
+import os
+import sys
+import json
+import fnmatch
+import platform
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks import generators
+from benchmarks.suite import BENCHMARKS, REPO_ROOT, run_case
+
+
+def prepare_data(data_dir: Path, count: int, image_count: int, seed: int) -> Dict:
+    """Generate (or reuse) the synthetic inputs for one scale."""
+    scale_dir = data_dir / f"{count}-{seed}"
+    listings_path = scale_dir / "data.json"
+    db_path = scale_dir / "ebay_data.db"
+    marker = scale_dir / ".complete"
+
+    if not marker.exists():
+        print(f"Generating synthetic data for {count} items in {scale_dir}...")
+        generators.generate_listings(listings_path, count, seed=seed)
+        generators.generate_database(db_path, count, seed=seed)
+        marker.touch()
+    images = generators.generate_images(scale_dir / "images", image_count, seed=seed)
+
+    return {
+        'count': count,
+        'seed': seed,
+        'listings_path': str(listings_path),
+        'db_path': str(db_path),
+        'images': [str(path) for path in images],
+    }
+
+
+def run_benchmarks(names: List[str], context: Dict) -> Dict:
+    results = {}
+    spawn = multiprocessing.get_context('spawn')
+    for name in names:
+        print(f"  {name} ...", end=' ', flush=True)
+        # A fresh process per benchmark keeps peak RSS attributable
+        with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as executor:
+            try:
+                result = executor.submit(run_case, name, context).result()
+            except Exception as e:
+                print(f"failed: {e}")
+                results[name] = {'error': str(e)}
+                continue
+        results[name] = result
+        print(f"{result['throughput']:.1f} {result['unit']}/s, "
+              f"p50 {result['p50_ms']:.3f} ms, p99 {result['p99_ms']:.3f} ms, "
+              f"peak RSS {result['peak_rss_mb']:.1f} MB")
+    return results
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """Return a description of every metric that regressed beyond `threshold`."""
+    regressions = []
+    print(f"\n{'benchmark':40} {'throughput':>12} {'p99':>10} {'peak RSS':>10}")
+    for name, before in sorted(baseline['results'].items()):
+        # A benchmark that stops running is a regression, not a skipped row
+        if name not in current['results']:
+            regressions.append(f"{name}: missing from current results")
+        elif 'error' in current['results'][name] and 'error' not in before:
+            regressions.append(f"{name}: failed: {current['results'][name]['error']}")
+
+    for name, now in sorted(current['results'].items()):
+        before = baseline['results'].get(name)
+        if not before or 'error' in before or 'error' in now:
+            continue
+
+        changes = {
+            'throughput': now['throughput'] / before['throughput'] - 1 if before['throughput'] else 0.0,
+            'p99': now['p99_ms'] / before['p99_ms'] - 1 if before['p99_ms'] else 0.0,
+            'peak RSS': now['peak_rss_mb'] / before['peak_rss_mb'] - 1 if before['peak_rss_mb'] else 0.0,
+        }
+        print(f"{name:40} {changes['throughput']:>+11.1%} {changes['p99']:>+9.1%} "
+              f"{changes['peak RSS']:>+9.1%}")
+
+        # Lower throughput is worse; higher latency and memory are worse
+        if changes['throughput'] < -threshold:
+            regressions.append(f"{name}: throughput {changes['throughput']:+.1%}")
+        if changes['p99'] > threshold:
+            regressions.append(f"{name}: p99 latency {changes['p99']:+.1%}")
+        if changes['peak RSS'] > threshold:
+            regressions.append(f"{name}: peak RSS {changes['peak RSS']:+.1%}")
+    return regressions
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Benchmark the pipeline hot paths')
+    parser.add_argument('--scale', default='1k', choices=list(generators.SCALES),
+                        help='Number of synthetic listings')
+    parser.add_argument('--only', action='append', default=[],
+                        help='Glob of benchmarks to run (repeatable), e.g. "dataset.*"')
+    parser.add_argument('--list', action='store_true', help='List benchmarks and exit')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Iterations for whole-dataset benchmarks')
+    parser.add_argument('--model-iterations', type=int, default=50,
+                        help='Iterations for model generation benchmarks')
+    parser.add_argument('--images', type=int, default=1000, help='Maximum synthetic images')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for synthetic data')
+    parser.add_argument('--data-dir', default=str(Path(tempfile.gettempdir()) / 'ebayseo-benchmarks'),
+                        help='Cache directory for synthetic data')
+    parser.add_argument('--output', help='Write results JSON here')
+    parser.add_argument('--results', help='Existing results JSON to compare instead of running')
+    parser.add_argument('--compare', help='Baseline results JSON; exit 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative change treated as a regression')
+
+    args = parser.parse_args()
+
+    if args.list:
+        print('\n'.join(sorted(BENCHMARKS)))
+        return
+
+    if args.results:
+        with open(args.results) as f:
+            current = json.load(f)
+    else:
+        # Benchmark the code, not the instrumentation; keep config resolvable from any cwd
+        os.environ.setdefault('PROMETHEUS_ENABLED', 'false')
+        os.environ.setdefault('CONFIG_PATH', str(REPO_ROOT / 'config' / 'config.yaml'))
+
+        names = sorted(BENCHMARKS)
+        if args.only:
+            names = [name for name in names
+                     if any(fnmatch.fnmatch(name, pattern) for pattern in args.only)]
+
+        count = generators.SCALES[args.scale]
+        context = prepare_data(Path(args.data_dir), count, min(count, args.images), args.seed)
+        work_dir = Path(tempfile.mkdtemp(prefix='ebayseo-bench-'))
+        context.update({
+            'work_dir': str(work_dir),
+            'repeat': args.repeat,
+            'model_iterations': args.model_iterations,
+        })
+
+        print(f"Running {len(names)} benchmarks at scale {args.scale}")
+        current = {
+            'meta': {
+                'scale': args.scale,
+                'count': count,
+                'seed': args.seed,
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            },
+            'results': run_benchmarks(names, context),
+        }
+
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(current, f, indent=2)
+            print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get('meta', {}).get('scale') != current.get('meta', {}).get('scale'):
+            print("Warning: baseline and current results use different scales")
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo regressions")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+import time
+import random
+import logging
+import resource
+import importlib.util
+from pathlib import Path
+from typing import Callable, Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+BENCHMARKS: Dict[str, Callable] = {}
+
+
+class Case:
+    """A prepared benchmark: `op` is timed `iterations` times."""
+
+    def __init__(self, op: Callable[[int], None], iterations: int,
+                 items_per_op: int = 1, unit: str = "items"):
+        self.op = op
+        self.iterations = iterations
+        self.items_per_op = items_per_op
+        self.unit = unit
+
+
+def benchmark(name: str):
+    """Register a function `setup(context) -> Case` under `name`."""
+    def decorator(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return decorator
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def run_case(name: str, context: Dict) -> Dict:
+    """Set up and time one benchmark. Runs in a fresh process per benchmark."""
+    logging.disable(logging.CRITICAL)
+    case = BENCHMARKS[name](context)
+
+    # One untimed call to warm caches and lazy imports
+    case.op(0)
+
+    latencies = []
+    started = time.perf_counter()
+    for i in range(case.iterations):
+        op_started = time.perf_counter()
+        case.op(i)
+        latencies.append(time.perf_counter() - op_started)
+    elapsed = time.perf_counter() - started
+
+    # ru_maxrss is KiB on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return {
+        'iterations': case.iterations,
+        'unit': case.unit,
+        'throughput': case.items_per_op * case.iterations / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'peak_rss_mb': peak_rss / (1024 * 1024),
+    }
+
+
+# ---- helpers ---------------------------------------------------------------
+
+def build_tiny_model(path: Path, corpus: List[str]) -> Path:
+    """Build a small randomly initialised T5 with a word-level tokenizer, fully offline."""
+    if (path / "config.json").exists():
+        return path
+
+    import torch
+    from tokenizers import Tokenizer, models, pre_tokenizers, trainers
+    from transformers import PreTrainedTokenizerFast, T5Config, T5ForConditionalGeneration
+
+    tokenizer = Tokenizer(models.WordLevel(unk_token="<unk>"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.train_from_iterator(
+        corpus, trainers.WordLevelTrainer(special_tokens=["<pad>", "</s>", "<unk>"]))
+    fast = PreTrainedTokenizerFast(tokenizer_object=tokenizer, pad_token="<pad>",
+                                   eos_token="</s>", unk_token="<unk>")
+
+    torch.manual_seed(0)
+    config = T5Config(vocab_size=len(fast), d_model=64, d_ff=128, d_kv=16,
+                      num_layers=2, num_decoder_layers=2, num_heads=2,
+                      pad_token_id=fast.pad_token_id, eos_token_id=fast.eos_token_id,
+                      decoder_start_token_id=fast.pad_token_id)
+    model = T5ForConditionalGeneration(config)
+    model.save_pretrained(path)
+    fast.save_pretrained(path)
+    return path
+
+
+def seo_generator(context: Dict):
+    from benchmarks.generators import ADJECTIVES, BRANDS, CATEGORIES, NOUNS
+    from python_src.generate_seo import SEOGenerator
+
+    corpus = [' '.join(ADJECTIVES + BRANDS + CATEGORIES + NOUNS),
+              "generate keywords Generate SEO description for Price Condition Keywords"]
+    model_path = build_tiny_model(Path(context['work_dir']) / "tiny-t5", corpus)
+    return SEOGenerator(model_name=str(model_path))
+
+
+def sample_features(context: Dict, count: int) -> List[Dict]:
+    from benchmarks.generators import make_listing
+    rng = random.Random(context['seed'])
+    return [make_listing(rng, i) for i in range(count)]
+
+
+def load_visualizer():
+    spec = importlib.util.spec_from_file_location(
+        "visualize", REPO_ROOT / "visualization" / "visualize.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.DataVisualizer
+
+
+# ---- dataset creation ------------------------------------------------------
+
+def _dataset_case(context: Dict, format: str) -> Case:
+    from python_src.create_datasets import DatasetCreator
+
+    output_dir = Path(context['work_dir']) / "datasets"
+    creator = DatasetCreator(input_path=str(output_dir), output_path=str(output_dir),
+                             format=format, batch_size=100)
+    creator.initialize_directories()
+
+    def op(i):
+        creator.create_dataset(Path(context['listings_path']), output_dir / f"dataset.{format}")
+
+    return Case(op, context['repeat'], items_per_op=context['count'])
+
+
+for _format in ("json", "jsonl", "csv", "parquet"):
+    benchmark(f"dataset.create.{_format}")(
+        lambda context, _format=_format: _dataset_case(context, _format))
+
+
+# ---- SEO -------------------------------------------------------------------
+
+@benchmark("seo.score")
+def seo_score(context: Dict) -> Case:
+    generator = seo_generator(context)
+    samples = [(item['description'][:150], item['title'].lower().split())
+               for item in sample_features(context, 1000)]
+
+    def op(i):
+        description, keywords = samples[i % len(samples)]
+        generator._calculate_seo_score(description, keywords)
+
+    return Case(op, min(context['count'], 100_000))
+
+
+@benchmark("seo.keywords")
+def seo_keywords(context: Dict) -> Case:
+    generator = seo_generator(context)
+    features = sample_features(context, 100)
+
+    def op(i):
+        generator.generate_keywords(features[i % len(features)])
+
+    return Case(op, min(context['count'], context['model_iterations']))
+
+
+def _description_case(context: Dict, template_tier: bool) -> Case:
+    generator = seo_generator(context)
+    generator.template_tier_enabled = template_tier
+    generator.template_min_score = 0
+    features = sample_features(context, 100)
+    keywords = [item['title'].lower().split() + [item['category']] for item in features]
+
+    def op(i):
+        generator.generate_description(features[i % len(features)], keywords[i % len(keywords)])
+
+    iterations = context['count'] if template_tier else context['model_iterations']
+    return Case(op, min(context['count'], iterations))
+
+
+benchmark("seo.describe.template")(lambda context: _description_case(context, True))
+benchmark("seo.describe.model")(lambda context: _description_case(context, False))
+
+
+# ---- dashboard and reports -------------------------------------------------
+
+def _dashboard_case(context: Dict, method: str) -> Case:
+    from python_src.gradio_app import EbayDashboard
+
+    dashboard = EbayDashboard(db_path=context['db_path'])
+    query = getattr(dashboard, method)
+    return Case(lambda i: query(), context['repeat'], unit="queries")
+
+
+for _method in ("get_price_trends", "get_category_distribution", "get_quality_analysis"):
+    benchmark(f"dashboard.{_method}")(
+        lambda context, _method=_method: _dashboard_case(context, _method))
+
+
+@benchmark("report.html")
+def report_html(context: Dict) -> Case:
+    visualizer = load_visualizer()(context['db_path'])
+    output_path = Path(context['work_dir']) / "report.html"
+    return Case(lambda i: visualizer.generate_html_report(str(output_path)),
+                context['repeat'], unit="reports")
+
+
+# ---- uploads ---------------------------------------------------------------
+
+@benchmark("upload.file")
+def upload_file(context: Dict) -> Case:
+    from benchmarks.fakes import FakeCloudUploader
+
+    uploader = FakeCloudUploader(str(Path(context['work_dir']) / "bucket"))
+    images = context['images']
+
+    def op(i):
+        uploader.upload_file(images[i % len(images)], f"images/{i}.jpg")
+
+    return Case(op, len(images), unit="files")
+
+
+@benchmark("upload.dataset")
+def upload_dataset(context: Dict) -> Case:
+    from benchmarks.fakes import FakeCloudUploader
+
+    uploader = FakeCloudUploader(str(Path(context['work_dir']) / "bucket"))
+    metadata = {'source': 'benchmark', 'count': context['count']}
+    return Case(lambda i: uploader.upload_dataset(context['listings_path'], metadata),
+                context['repeat'], items_per_op=context['count'])
@@ -12,6 +12,7 @@ local CONFIG = {
     text_dir = "/app/data/descriptions",
     temp_dir = "/app/images/temp",
     batch_size = 50,
+    -- "shards" is also accepted: WebDataset-style tar shards without base64
     formats = {
         "json",
         "csv",
@@ -22,6 +23,9 @@ local CONFIG = {
 -- Initialize Python bridge for dataset creation
 local py = require("python")
 py.execute([[
+import sys
+sys.path.append("/app/python_src")
+from image_text_dataset import write_image_text_shards
 import pandas as pd
 import numpy as np
 from PIL import Image
@@ -38,6 +42,10 @@ def image_to_base64(image_path):
 
 def create_paired_dataset(image_paths, texts, output_path, format):
     try:
+        if format == 'shards':
+            write_image_text_shards(image_paths, texts, output_path)
+            return True
+
         data = []
         for img_path, text in zip(image_paths, texts):
             img_data = image_to_base64(img_path)
@@ -12,20 +12,47 @@ M.current_level = M.INFO
 -- Debug output file
 M.log_file = "debug.log"
 
+-- Handle kept open across messages; writes are buffered and flushed
+-- every flush_interval messages and on warnings/errors
+local handle = nil
+local pending = 0
+M.flush_interval = 50
+
+local function open_log()
+    if not handle then
+        handle = io.open(M.log_file, "a")
+        if handle then
+            handle:setvbuf("full")
+        end
+    end
+    return handle
+end
+
 -- Initialize logging
 function M.init(options)
     options = options or {}
     M.current_level = options.level or M.INFO
+    M.flush_interval = options.flush_interval or M.flush_interval
+    M.close()
     M.log_file = options.log_file or "debug.log"
     
     -- Create log file
-    local f = io.open(M.log_file, "a")
+    local f = open_log()
     if f then
         f:write("\n--- New Debug Session Started ---\n")
-        f:close()
+        f:flush()
     end
 end
 
+-- Flush and close the log file
+function M.close()
+    if handle then
+        handle:close()
+        handle = nil
+    end
+    pending = 0
+end
+
 -- Log message with level
 function M.log(level, message, data)
     if level >= M.current_level then
@@ -50,10 +77,14 @@ function M.log(level, message, data)
         print(log_message)
         
         -- Write to file
-        local f = io.open(M.log_file, "a")
+        local f = open_log()
         if f then
             f:write(log_message .. "\n")
-            f:close()
+            pending = pending + 1
+            if level >= M.WARNING or pending >= M.flush_interval then
+                f:flush()
+                pending = 0
+            end
         end
     end
 end
@@ -15,7 +15,7 @@ local CONFIG = {
         "/app/lua-scripts/pipeline.lua",
         "/app/data/ebay_data.db"
     },
-    metrics_port = 8080,
+    metrics_port = tonumber(os.getenv("METRICS_PORT")) or 9090,
     min_disk_space = 1024 * 1024 * 100, -- 100MB
     max_log_size = 1024 * 1024 * 500    -- 500MB
 }
@@ -128,6 +128,14 @@ function main()
         log('Invalid storage service choice.')
     end
 
+    -- Step 10: Embed new listings for the dashboard's similar-listing search
+    log('Updating similarity index...')
+    exec_cmd('cd /app && python3 -m python_src.similarity')
+
+    -- Step 11: Fold new SEO keywords into the index used to rank keywords
+    log('Updating keyword index...')
+    exec_cmd('cd /app && python3 -m python_src.keyword_index')
+
     log('Pipeline completed successfully.')
     print('Pipeline completed successfully. Check logs for details.')
 end
@@ -8,6 +8,16 @@ from pathlib import Path
 from typing import Dict, List, Optional
 import pandas as pd
 
+try:
+    from .dataset_reader import DatasetReader
+    from .logging_setup import setup_logging
+    from .metrics import metrics
+except ImportError:
+    # Run as a script from python_src/
+    from dataset_reader import DatasetReader
+    from logging_setup import setup_logging
+    from metrics import metrics
+
 class DatasetCreator:
     def __init__(self, input_path: str = "./data/raw",
                  output_path: str = "./data/processed",
@@ -22,15 +32,7 @@ class DatasetCreator:
         self.setup_logging()
 
     def setup_logging(self):
-        """Initialize logging configuration."""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('dataset_creation.log'),
-                logging.StreamHandler()
-            ]
-        )
+        """Initialize the logger; process-wide handlers are configured in `main()`."""
         self.logger = logging.getLogger(__name__)
 
     def initialize_directories(self):
@@ -47,10 +49,14 @@ class DatasetCreator:
             for image in images:
                 try:
                     # Add image processing logic here
-                    self.logger.info(f"Processing image: {image.name}")
+                    self.logger.info(f"Processing image: {image.name}",
+                                     extra={'stage': 'image_processing'})
+                    metrics.inc('items_processed_total', stage='image_processing')
                 except Exception as e:
-                    self.logger.error(f"Error processing image {image.name}: {str(e)}")
+                    self.logger.error(f"Error processing image {image.name}: {str(e)}",
+                                      extra={'stage': 'image_processing'})
 
+    @metrics.timed('dataset_creation')
     def create_dataset(self, input_data: Path, output_file: Path):
         """Create the dataset from input data."""
         try:
@@ -79,12 +85,27 @@ class DatasetCreator:
             if self.format == "json":
                 with open(output_file, 'w') as f:
                     json.dump(processed_data, f, indent=2)
+            elif self.format == "jsonl":
+                with open(output_file, 'w') as f:
+                    for processed_item in processed_data:
+                        f.write(json.dumps(processed_item) + '\n')
             elif self.format == "csv":
                 df = pd.DataFrame(processed_data)
                 df.to_csv(output_file, index=False)
+            elif self.format == "parquet":
+                df = pd.DataFrame(processed_data)
+                # Small row groups keep DatasetReader random access cheap
+                df.to_parquet(output_file, index=False, row_group_size=10000)
             else:
                 raise ValueError(f"Unsupported format: {self.format}")
+
+            # Ship the offset index so readers don't have to rescan the file
+            if self.format in ("json", "jsonl", "csv"):
+                DatasetReader.build_index(str(output_file), self.format)
             
+            metrics.inc('items_processed_total', len(processed_data), stage='dataset_creation')
+            metrics.inc('bytes_processed_total', Path(output_file).stat().st_size,
+                        stage='dataset_creation')
             self.logger.info(f"Dataset created successfully: {output_file}")
         except Exception as e:
             self.logger.error(f"Error creating dataset: {str(e)}")
@@ -95,12 +116,13 @@ def main():
     parser = argparse.ArgumentParser(description='Create datasets from raw data')
     parser.add_argument('--input-path', default='./data/raw', help='Input data path')
     parser.add_argument('--output-path', default='./data/processed', help='Output data path')
-    parser.add_argument('--format', default='json', choices=['json', 'csv'], help='Output format')
+    parser.add_argument('--format', default='json', choices=['json', 'jsonl', 'csv', 'parquet'], help='Output format')
     parser.add_argument('--batch-size', type=int, default=100, help='Batch size for processing')
     parser.add_argument('--include-images', action='store_true', help='Include image processing')
     
     args = parser.parse_args()
-    
+
+    setup_logging(stage='dataset_creation')
     creator = DatasetCreator(
         input_path=args.input_path,
         output_path=args.output_path,
@@ -0,0 +1,365 @@
+import os
+import io
+import csv
+import json
+import mmap
+import bisect
+import logging
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+import numpy as np
+
+try:
+    from .metrics import metrics
+except ImportError:
+    # Run as a script from python_src/
+    from metrics import metrics
+
+
+class DatasetReader:
+    """Random access to datasets produced by `DatasetCreator`.
+
+    JSON, JSON Lines and CSV files are opened read-only with `mmap`, so any
+    number of processes reading the same dataset share the OS page cache.
+    Record boundaries come from an offset index stored next to the dataset:
+    `<file>.idx.npy` holds the record offsets, `<file>.ids.npy` the record
+    ids sorted for binary search, and `<file>.idx.json` the metadata used to
+    detect a stale index. It is shipped by `DatasetCreator` or built on first
+    open. Both arrays are loaded with `mmap_mode='r'`, so they are shared
+    between processes as well, and only the records that are actually
+    requested get parsed.
+
+    Parquet files are read through pyarrow's memory-mapped reader one row
+    group at a time.
+
+    CSV values are returned as strings, exactly as `csv` parses them.
+    """
+
+    FORMATS = {'.json': 'json', '.jsonl': 'jsonl', '.csv': 'csv', '.parquet': 'parquet'}
+
+    def __init__(self, path: str, format: Optional[str] = None,
+                 columns: Optional[List[str]] = None, id_column: str = 'id'):
+        self.logger = logging.getLogger(__name__)
+        self.path = Path(path)
+        self.format = (format or self.FORMATS.get(self.path.suffix.lower(), '')).lower()
+        if self.format not in self.FORMATS.values():
+            raise ValueError(f"Unsupported format: {self.format or self.path.suffix}")
+        self.columns = columns
+        self.id_column = id_column
+        self._id_map: Optional[Dict[str, int]] = None
+        self._ids: Optional[np.ndarray] = None
+
+        if self.format == 'parquet':
+            self._open_parquet()
+        else:
+            self._open_text()
+
+    # ---- index ----------------------------------------------------------
+
+    @staticmethod
+    def index_path(path: Union[str, Path]) -> Path:
+        """Metadata file of the offset index; it is written last."""
+        path = Path(path)
+        return path.with_name(path.name + '.idx.json')
+
+    @staticmethod
+    def _index_arrays(path: Union[str, Path]) -> Dict[str, Path]:
+        path = Path(path)
+        return {'offsets': path.with_name(path.name + '.idx.npy'),
+                'ids': path.with_name(path.name + '.ids.npy')}
+
+    @classmethod
+    def build_index(cls, path: str, format: Optional[str] = None,
+                    id_column: str = 'id') -> Path:
+        """Scan a JSON/JSON Lines/CSV dataset once and write its offset index."""
+        path = Path(path)
+        format = (format or cls.FORMATS.get(path.suffix.lower(), '')).lower()
+        with open(path, 'rb') as f:
+            # Stat before scanning so a concurrent rewrite leaves the index stale
+            stat = os.fstat(f.fileno())
+            if stat.st_size == 0:
+                data = b''
+            else:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                if format == 'jsonl':
+                    offsets, header = cls._scan_lines(data), None
+                elif format == 'csv':
+                    offsets = cls._scan_csv(data)
+                    header, offsets = offsets[:1], offsets[1:]
+                elif format == 'json':
+                    offsets, header = cls._scan_json_array(data), None
+                else:
+                    raise ValueError(f"Cannot index format: {format}")
+                ids = cls._scan_ids(data, format, offsets, header, id_column)
+            finally:
+                if isinstance(data, mmap.mmap):
+                    data.close()
+
+        arrays = {'offsets': np.asarray(offsets, dtype=np.int64).reshape(-1, 2)}
+        if ids:
+            # UTF-8 bytes instead of a `U` array, which takes 4 bytes per character
+            encoded = np.asarray([record_id.encode('utf-8') for record_id in ids])
+            entries = np.empty(len(ids), dtype=[('id', encoded.dtype), ('row', np.int64)])
+            entries['id'] = encoded
+            entries['row'] = np.arange(len(ids))
+            entries.sort(order=['id', 'row'], kind='stable')
+            arrays['ids'] = entries
+        meta = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'count': len(offsets),
+            'header': header[0] if header else None,
+            'id_column': id_column if ids else None,
+        }
+
+        # Readers may open the index at any time: write everything under
+        # per-process temporary names and publish the metadata last
+        paths = cls._index_arrays(path)
+        suffix = f'.{os.getpid()}.tmp'
+        for name, array in arrays.items():
+            tmp_path = paths[name].with_name(paths[name].name + suffix)
+            with open(tmp_path, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmp_path, paths[name])
+        index_path = cls.index_path(path)
+        tmp_path = index_path.with_name(index_path.name + suffix)
+        tmp_path.write_text(json.dumps(meta))
+        os.replace(tmp_path, index_path)
+        return index_path
+
+    @classmethod
+    def _scan_ids(cls, data, format: str, offsets: List[List[int]],
+                  header: Optional[List[List[int]]], id_column: str) -> List[str]:
+        if format == 'csv':
+            if not header:
+                return []
+            names = cls._parse_csv(data[header[0][0]:header[0][1]])
+            if id_column not in names:
+                return []
+            position = names.index(id_column)
+            return [cls._parse_csv(data[start:stop])[position] for start, stop in offsets]
+
+        ids = []
+        for start, stop in offsets:
+            record = json.loads(data[start:stop])
+            ids.append(str(record.get(id_column)) if isinstance(record, dict) else '')
+        return ids
+
+    @staticmethod
+    def _scan_lines(data) -> List[List[int]]:
+        offsets = []
+        start = 0
+        end = len(data)
+        while start < end:
+            stop = data.find(b'\n', start)
+            if stop == -1:
+                stop = end
+            if data[start:stop].strip():
+                offsets.append([start, stop])
+            start = stop + 1
+        return offsets
+
+    @staticmethod
+    def _scan_csv(data) -> List[List[int]]:
+        """Record boundaries for CSV, allowing newlines inside quoted fields."""
+        offsets = []
+        start = 0
+        record_start = 0
+        quotes = 0
+        end = len(data)
+        while start < end:
+            stop = data.find(b'\n', start)
+            if stop == -1:
+                stop = end
+            quotes += data[start:stop].count(b'"')
+            # Doubled "" escapes keep the parity intact
+            if quotes % 2 == 0:
+                if data[record_start:stop].strip():
+                    offsets.append([record_start, stop])
+                record_start = stop + 1
+                quotes = 0
+            start = stop + 1
+        return offsets
+
+    @staticmethod
+    def _scan_json_array(data) -> List[List[int]]:
+        decoder = json.JSONDecoder()
+        text = bytes(data).decode('utf-8')
+        offsets = []
+        pos = text.find('[') + 1
+        # Byte offsets differ from str offsets for non-ASCII text
+        encoded_upto = 0
+        byte_pos = 0
+        while True:
+            while pos < len(text) and text[pos] in ' \t\r\n,':
+                pos += 1
+            if pos >= len(text) or text[pos] == ']':
+                break
+            _, stop = decoder.raw_decode(text, pos)
+            start_bytes = byte_pos + len(text[encoded_upto:pos].encode('utf-8'))
+            stop_bytes = start_bytes + len(text[pos:stop].encode('utf-8'))
+            offsets.append([start_bytes, stop_bytes])
+            encoded_upto, byte_pos = stop, stop_bytes
+            pos = stop
+        return offsets
+
+    # ---- text formats ---------------------------------------------------
+
+    def _open_text(self):
+        stat = self.path.stat()
+        size = stat.st_size
+        index = self._load_index(stat)
+        if index is None:
+            self.logger.info(f"Building offset index for {self.path}")
+            self.build_index(str(self.path), self.format, self.id_column)
+            index = self._load_index(stat)
+            if index is None:
+                raise RuntimeError(f"Offset index for {self.path} is inconsistent")
+
+        meta, self._offsets, ids = index
+        if meta['id_column'] == self.id_column:
+            self._ids = ids
+        with open(self.path, 'rb') as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+
+        self._header = None
+        if self.format == 'csv' and meta['header']:
+            start, stop = meta['header']
+            self._header = self._parse_csv(self._data[start:stop])
+
+    def _load_index(self, stat: os.stat_result):
+        """Metadata and memory-mapped arrays, or None if missing or stale."""
+        index_path = self.index_path(self.path)
+        paths = self._index_arrays(self.path)
+        try:
+            meta = json.loads(index_path.read_text())
+        except (OSError, ValueError):
+            return None
+        # Same-size rewrites are common (fixed-width timestamps), so check mtime too
+        if meta.get('size') != stat.st_size or meta.get('mtime_ns') != stat.st_mtime_ns:
+            return None
+        try:
+            offsets = np.load(paths['offsets'], mmap_mode='r')
+            ids = np.load(paths['ids'], mmap_mode='r') if meta['id_column'] else None
+        except (OSError, ValueError):
+            return None
+        # A concurrent rebuild may have replaced the arrays after the metadata was read
+        if len(offsets) != meta['count'] or (ids is not None and len(ids) != meta['count']):
+            return None
+        return meta, offsets, ids
+
+    @staticmethod
+    def _parse_csv(raw: bytes) -> List[str]:
+        return next(csv.reader(io.StringIO(raw.decode('utf-8'), newline='')))
+
+    def _parse(self, row: int, columns: Optional[List[str]]) -> Dict:
+        start, stop = self._offsets[row]
+        raw = self._data[start:stop]
+        if self.format == 'csv':
+            record = dict(zip(self._header, self._parse_csv(raw)))
+        else:
+            record = json.loads(raw)
+        if columns:
+            return {column: record.get(column) for column in columns}
+        return record
+
+    # ---- parquet --------------------------------------------------------
+
+    def _open_parquet(self):
+        import pyarrow.parquet as pq
+
+        self._parquet = pq.ParquetFile(str(self.path), memory_map=True)
+        metadata = self._parquet.metadata
+        self._group_starts = []
+        total = 0
+        for group in range(metadata.num_row_groups):
+            self._group_starts.append(total)
+            total += metadata.row_group(group).num_rows
+        self._num_rows = total
+        self._cached_group = (None, None, None)
+
+    def _row_group(self, group: int, columns: Optional[List[str]]):
+        cached_group, cached_columns, table = self._cached_group
+        if cached_group != group or cached_columns != columns:
+            metrics.inc('cache_misses_total', cache='parquet_row_group')
+            table = self._parquet.read_row_group(group, columns=columns)
+            self._cached_group = (group, columns, table)
+        else:
+            metrics.inc('cache_hits_total', cache='parquet_row_group')
+        return table
+
+    def _parse_parquet(self, row: int, columns: Optional[List[str]]) -> Dict:
+        group = bisect.bisect_right(self._group_starts, row) - 1
+        table = self._row_group(group, columns)
+        return table.slice(row - self._group_starts[group], 1).to_pylist()[0]
+
+    # ---- public API -----------------------------------------------------
+
+    def __len__(self) -> int:
+        if self.format == 'parquet':
+            return self._num_rows
+        return len(self._offsets)
+
+    def record(self, row: int, columns: Optional[List[str]] = None) -> Dict:
+        """Return one record, optionally projected to `columns`."""
+        columns = columns or self.columns
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        if self.format == 'parquet':
+            return self._parse_parquet(row, columns)
+        return self._parse(row, columns)
+
+    def __getitem__(self, key: Union[int, slice]):
+        if isinstance(key, slice):
+            return list(self.iter(*key.indices(len(self))))
+        return self.record(key)
+
+    def iter(self, start: int = 0, stop: Optional[int] = None, step: int = 1,
+             columns: Optional[List[str]] = None) -> Iterator[Dict]:
+        """Iterate over a range of records."""
+        stop = len(self) if stop is None else stop
+        for row in range(start, stop, step):
+            yield self.record(row, columns)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return self.iter()
+
+    def get(self, record_id, default=None) -> Optional[Dict]:
+        """Look up a record by its id column."""
+        if self._ids is not None:
+            return self._lookup(record_id, default)
+        if self._id_map is None:
+            if self.format == 'parquet':
+                ids = [str(value) for value in
+                       self._parquet.read(columns=[self.id_column]).column(0).to_pylist()]
+            else:
+                # Index was built for another id column
+                ids = [str(record[self.id_column])
+                       for record in self.iter(columns=[self.id_column])]
+            self._id_map = {record_id: row for row, record_id in enumerate(ids)}
+        row = self._id_map.get(str(record_id))
+        return default if row is None else self.record(row)
+
+    def _lookup(self, record_id, default=None) -> Optional[Dict]:
+        """Binary search over the sorted ids of the offset index."""
+        key = str(record_id).encode('utf-8')
+        ids = self._ids['id']
+        # The last row wins for duplicate ids, as with the id map
+        position = int(np.searchsorted(ids, key, side='right')) - 1
+        if position < 0 or ids[position] != key:
+            return default
+        return self.record(int(self._ids['row'][position]))
+
+    def close(self):
+        if isinstance(getattr(self, '_data', None), mmap.mmap):
+            self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
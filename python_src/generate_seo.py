@@ -1,9 +1,14 @@
 import torch
-from transformers import AutoTokenizer, AutoModelForSeq2SeqGeneration
+import numpy as np
+from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
 import json
+import time
 import logging
+from pathlib import Path
 from typing import Dict, List, Optional
 from .config import config
+from .keyword_index import KeywordIndex
+from .metrics import metrics
 
 class SEOGenerator:
     def __init__(self):
@@ -11,17 +16,53 @@ class SEOGenerator:
         self.max_length = config.get('seo', 'model', 'max_length')
         self.batch_size = config.get('seo', 'model', 'batch_size')
         
+# Mirrors CONFIG.templates in generate_seo_desc.lua
+DEFAULT_TEMPLATES = [
+    "Discover {title} - {keywords} perfect for {category}. {condition}",
+    "Experience the quality of {title} featuring {keywords}. {condition}",
+    "Premium {title} with {keywords} - ideal for {category}. {condition}"
+]
+
+class _MissingAsEmpty(dict):
+    def __missing__(self, key):
+        return ''
+
 class SEOGenerator:
-    def __init__(self):
+    def __init__(self, keyword_index: Optional[KeywordIndex] = None,
+                 model_name: Optional[str] = None):
         self.logger = logging.getLogger(__name__)
-        self.model_name = "t5-base"  # or your preferred model
+        self.model_name = model_name or "t5-base"  # or your preferred model
+        self.keyword_index = (keyword_index if keyword_index is not None
+                              else self._load_keyword_index())
+        self.setup_template_tier()
         try:
             self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-            self.model = AutoModelForSeq2SeqGeneration.from_pretrained(self.model_name)
+            self.model = AutoModelForSeq2SeqLM.from_pretrained(self.model_name)
         except Exception as e:
             self.logger.error(f"Failed to load model: {str(e)}")
             raise
 
+    def _load_keyword_index(self) -> Optional[KeywordIndex]:
+        """Load the index built by `python -m python_src.keyword_index`, if any."""
+        index_path = config.get('seo', 'keywords', 'index_path')
+        if not index_path or not (Path(index_path) / "state.json").exists():
+            return None
+        try:
+            return KeywordIndex.load(index_path)
+        except Exception as e:
+            self.logger.error(f"Failed to load keyword index from {index_path}: {str(e)}")
+            return None
+
+    def _rank_keywords(self, features: Optional[Dict], keywords: List[str]) -> List[str]:
+        if self.keyword_index is None or not features:
+            return keywords
+        try:
+            return self.keyword_index.rank_keywords(features, keywords)
+        except Exception as e:
+            self.logger.error(f"Keyword ranking failed: {str(e)}")
+            return keywords
+
+    @metrics.timed('seo_keywords')
     def generate_keywords(self, features: Dict) -> List[str]:
         """Generate SEO keywords from item features."""
         try:
@@ -43,13 +84,131 @@ class SEOGenerator:
             )
 
             keywords = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-            return keywords.split(',')
+            return self._rank_keywords(features, keywords.split(','))
         except Exception as e:
             self.logger.error(f"Keyword generation failed: {str(e)}")
             return []
 
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Embed texts as mean-pooled encoder hidden states."""
+        inputs = self.tokenizer(texts, return_tensors="pt", padding=True,
+                                max_length=512, truncation=True)
+        with torch.no_grad():
+            hidden = self.model.get_encoder()(
+                input_ids=inputs.input_ids,
+                attention_mask=inputs.attention_mask
+            ).last_hidden_state
+
+        # Mean over real tokens only
+        mask = inputs.attention_mask.unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+        return pooled.cpu().numpy()
+
+    def setup_template_tier(self):
+        """Load description templates and fast-tier settings."""
+        self.template_tier_enabled = config.get(
+            'seo', 'description', 'template_tier', 'enabled', default=True)
+        self.template_min_score = float(config.get(
+            'seo', 'description', 'template_tier', 'min_score', default=60))
+        self.template_categories = set(config.get(
+            'seo', 'description', 'template_tier', 'categories', default=[]) or [])
+        self.tier_stats = {
+            tier: {'count': 0, 'seconds': 0.0}
+            # template_escalated is the wasted template attempt before a model call
+            for tier in ('template', 'template_escalated', 'model')
+        }
+
+        self.templates = DEFAULT_TEMPLATES
+        templates_file = config.get('seo', 'description', 'templates_file')
+        if templates_file and Path(templates_file).exists():
+            try:
+                with open(templates_file) as f:
+                    templates = json.load(f)
+                if not isinstance(templates, (list, dict)):
+                    raise ValueError("expected a list or a per-category dict of templates")
+                self.templates = templates
+            except Exception as e:
+                self.logger.error(f"Failed to load templates from {templates_file}: {str(e)}")
+
+    def _templates_for(self, category: str) -> List[str]:
+        """Templates for a category; a templates file may be a list or a per-category dict."""
+        if isinstance(self.templates, dict):
+            return self.templates.get(category) or self.templates.get('default', [])
+        return self.templates
+
+    def generate_template_description(self, features: Dict, keywords: List[str]) -> Optional[Dict]:
+        """Fill every template and return the best-scoring description."""
+        values = _MissingAsEmpty({
+            key: value for key, value in features.items()
+            if value is not None and not isinstance(value, (list, dict))
+        })
+        values['keywords'] = ', '.join(keywords[:5])
+        values['keyword'] = keywords[0] if keywords else ''
+        values['features'] = ', '.join(features.get('visual_attributes', []) or [])
+
+        best = None
+        for template in self._templates_for(str(features.get('category', ''))):
+            try:
+                description = ' '.join(template.format_map(values).split())
+            except (AttributeError, IndexError, KeyError, TypeError, ValueError) as e:
+                self.logger.error(f"Invalid template {template!r}: {str(e)}")
+                continue
+            score = self._calculate_seo_score(description, keywords)
+            if best is None or score > best['score']:
+                best = {'description': description, 'score': score}
+        return best
+
+    def _use_template_tier(self, features: Dict) -> bool:
+        if not self.template_tier_enabled:
+            return False
+        return not self.template_categories or features.get('category') in self.template_categories
+
+    def _record_tier(self, tier: str, started: float):
+        elapsed = time.perf_counter() - started
+        self.tier_stats[tier]['count'] += 1
+        self.tier_stats[tier]['seconds'] += elapsed
+        metrics.observe('stage_duration_seconds', elapsed, stage='seo_description', tier=tier)
+        metrics.inc('items_processed_total', stage='seo_description', tier=tier)
+
+    def get_tier_stats(self) -> Dict:
+        """Per-tier counts and mean latency for tuning the score threshold."""
+        stats = {}
+        for tier, values in self.tier_stats.items():
+            count = values['count']
+            stats[tier] = {
+                'count': count,
+                'total_seconds': round(values['seconds'], 6),
+                'avg_latency_ms': round(values['seconds'] / count * 1000, 3) if count else 0.0
+            }
+        stats['escalations'] = self.tier_stats['template_escalated']['count']
+        stats['min_score'] = self.template_min_score
+        return stats
+
     def generate_description(self, features: Dict, keywords: List[str]) -> str:
-        """Generate SEO-optimized description."""
+        """Generate SEO-optimized description.
+
+        Tries the template tier first and only escalates to model generation
+        when the best template scores below `template_tier.min_score`.
+        """
+        if self._use_template_tier(features):
+            started = time.perf_counter()
+            try:
+                best = self.generate_template_description(features, keywords)
+            except Exception as e:
+                self.logger.error(f"Template description failed: {str(e)}")
+                best = None
+            if best and best['score'] >= self.template_min_score:
+                self._record_tier('template', started)
+                return best['description']
+            self._record_tier('template_escalated', started)
+
+        started = time.perf_counter()
+        description = self.generate_model_description(features, keywords)
+        self._record_tier('model', started)
+        return description
+
+    def generate_model_description(self, features: Dict, keywords: List[str]) -> str:
+        """Generate SEO-optimized description with the model."""
         try:
             # Combine features and keywords
             context = {
@@ -82,8 +241,11 @@ class SEOGenerator:
             self.logger.error(f"Description generation failed: {str(e)}")
             return ""
 
-    def optimize_metadata(self, description: str, keywords: List[str]) -> Dict:
+    def optimize_metadata(self, description: str, keywords: List[str],
+                          features: Optional[Dict] = None) -> Dict:
         """Create optimized metadata for SEO."""
+        keywords = self._rank_keywords(features, keywords)
+
         return {
             'meta_description': description[:160],  # Standard meta description length
             'meta_keywords': ','.join(keywords[:10]),  # Top 10 keywords
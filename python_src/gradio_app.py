@@ -1,22 +1,69 @@
 import gradio as gr
 import pandas as pd
 import json
+import asyncio
 import sqlite3
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 import plotly.express as px
 import plotly.graph_objects as go
+try:
+    from .logging_setup import setup_logging
+    from .similarity import SimilarListingIndex
+except ImportError:
+    # Run as a script from python_src/
+    from logging_setup import setup_logging
+    from similarity import SimilarListingIndex
 
 class EbayDashboard:
-    def __init__(self):
-        self.db_path = Path("/app/data/ebay_data.db")
+    # Plot name -> method that builds it
+    FIGURES = {
+        "price_trends": "get_price_trends",
+        "category_distribution": "get_category_distribution",
+        "quality_analysis": "get_quality_analysis",
+    }
+
+    def __init__(self, db_path: str = "/app/data/ebay_data.db",
+                 refresh_interval: float = 30.0,
+                 max_workers: int = 4,
+                 similarity_path: str = "/app/data/similarity_index"):
+        self.logger = logging.getLogger(__name__)
+        self.db_path = Path(db_path)
+        self.similarity_path = Path(similarity_path)
+        self.refresh_interval = refresh_interval
+        self.similarity_index = None
+        self._similarity_lock = threading.Lock()
+
+        # DB work runs here so a slow query never blocks the event loop
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix="dashboard-db")
+        self._local = threading.local()
+
+        # Figures computed so far; the background refresher keeps them current
+        self._figures: Dict[str, go.Figure] = {}
+        self._figures_version = 0
+        self._figures_lock = threading.Lock()
+        self._stop_refresh = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+
         self.setup_database_connection()
 
     def setup_database_connection(self):
         """Setup database connection and create views if needed."""
-        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
         self.create_analytics_views()
 
+    def _connection(self) -> sqlite3.Connection:
+        """Per-thread read connection; sqlite3 connections are not shared across threads."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path))
+            self._local.conn = conn
+        return conn
+
     def create_analytics_views(self):
         """Create SQL views for analytics."""
         views = {
@@ -47,14 +94,14 @@ class EbayDashboard:
 
     def get_price_trends(self) -> go.Figure:
         """Generate price trends visualization."""
-        df = pd.read_sql("SELECT * FROM price_trends", self.conn)
+        df = pd.read_sql("SELECT * FROM price_trends", self._connection())
         fig = px.line(df, x='date', y='avg_price',
                      title='Average Price Trends Over Time')
         return fig
 
     def get_category_distribution(self) -> go.Figure:
         """Generate category distribution visualization."""
-        df = pd.read_sql("SELECT * FROM category_stats", self.conn)
+        df = pd.read_sql("SELECT * FROM category_stats", self._connection())
         fig = px.bar(df, x='category', y='item_count',
                     title='Items by Category')
         return fig
@@ -65,42 +112,176 @@ class EbayDashboard:
             SELECT quality_score, price
             FROM items i
             JOIN analysis a ON i.id = a.item_id
-        """, self.conn)
+        """, self._connection())
         fig = px.scatter(df, x='quality_score', y='price',
                         title='Price vs Quality Score')
         return fig
 
+    def get_similar_listings(self, item_id: float, k: float = 10) -> pd.DataFrame:
+        """Find listings similar to the given item."""
+        try:
+            # Read-only: embedding and training run in `python -m python_src.similarity`
+            with self._similarity_lock:
+                if self.similarity_index is None:
+                    try:
+                        self.similarity_index = SimilarListingIndex(
+                            db_path=str(self.db_path), index_path=str(self.similarity_path),
+                            read_only=True)
+                    except FileNotFoundError:
+                        return pd.DataFrame({'error': [
+                            "Similarity index has not been built yet"]})
+                results = pd.DataFrame(self.similarity_index.similar(int(item_id), int(k)))
+
+            if results.empty:
+                return results
+            placeholders = ','.join('?' * len(results))
+            items = pd.read_sql(
+                f"SELECT id AS item_id, title, price FROM items WHERE id IN ({placeholders})",
+                self._connection(), params=results['item_id'].tolist()
+            )
+            return results.merge(items, on='item_id', how='left')
+        except Exception as e:
+            return pd.DataFrame({'error': [str(e)]})
+
+    def execute_query(self, query: str) -> pd.DataFrame:
+        """Run a Data Explorer query."""
+        try:
+            return pd.read_sql(query, self._connection())
+        except Exception as e:
+            return pd.DataFrame({'error': [str(e)]})
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def load_figure(self, name: str) -> go.Figure:
+        """Return a cached figure, computing it off the event loop on first use."""
+        figure = self._figures.get(name)
+        if figure is None:
+            figure = await self._run(getattr(self, self.FIGURES[name]))
+            with self._figures_lock:
+                self._figures.setdefault(name, figure)
+        return figure
+
+    async def execute_query_async(self, query: str) -> pd.DataFrame:
+        return await self._run(self.execute_query, query)
+
+    async def get_similar_listings_async(self, item_id: float, k: float = 10) -> pd.DataFrame:
+        return await self._run(self.get_similar_listings, item_id, k)
+
+    async def poll_figures(self, seen_version: int):
+        """Push figures recomputed since `seen_version` to a client session."""
+        if seen_version == self._figures_version:
+            return [seen_version] + [gr.update() for _ in self.FIGURES]
+        with self._figures_lock:
+            figures = [self._figures.get(name, gr.update()) for name in self.FIGURES]
+            version = self._figures_version
+        return [version] + figures
+
+    def refresh_figures(self):
+        """Recompute every figure that has been loaded at least once."""
+        with self._figures_lock:
+            names = list(self._figures)
+        if not names:
+            return
+        futures = {name: self.executor.submit(getattr(self, self.FIGURES[name]))
+                   for name in names}
+        figures = {}
+        for name, future in futures.items():
+            try:
+                figures[name] = future.result()
+            except Exception as e:
+                self.logger.error(f"Failed to refresh {name}: {str(e)}")
+        with self._figures_lock:
+            self._figures.update(figures)
+            self._figures_version += 1
+
+    def _refresh_loop(self):
+        # PRAGMA data_version changes whenever another connection commits
+        conn = sqlite3.connect(str(self.db_path))
+        try:
+            last_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            while not self._stop_refresh.wait(self.refresh_interval):
+                version = conn.execute("PRAGMA data_version").fetchone()[0]
+                if version != last_version:
+                    last_version = version
+                    self.refresh_figures()
+        except Exception as e:
+            self.logger.error(f"Background refresh stopped: {str(e)}")
+        finally:
+            conn.close()
+
+    def start_background_refresh(self):
+        """Recompute loaded figures in the background when the database changes."""
+        if self._refresher is None or not self._refresher.is_alive():
+            self._stop_refresh.clear()
+            self._refresher = threading.Thread(target=self._refresh_loop,
+                                               name="dashboard-refresh", daemon=True)
+            self._refresher.start()
+
+    def stop_background_refresh(self):
+        self._stop_refresh.set()
+        if self._refresher is not None:
+            self._refresher.join()
+        self.executor.shutdown(wait=False)
+
     def create_interface(self):
-        """Create Gradio interface."""
+        """Create Gradio interface.
+
+        Plots start empty and are loaded per tab when first shown, so the page
+        renders without waiting on any query.
+        """
+        plots = {}
         with gr.Blocks() as interface:
             gr.Markdown("# eBay SEO Analytics Dashboard")
-            
-            with gr.Tab("Price Analysis"):
-                gr.Plot(self.get_price_trends)
+            figures_version = gr.State(0)
+
+            with gr.Tab("Price Analysis") as price_tab:
+                plots["price_trends"] = gr.Plot()
                 
-            with gr.Tab("Category Analysis"):
-                gr.Plot(self.get_category_distribution)
+            with gr.Tab("Category Analysis") as category_tab:
+                plots["category_distribution"] = gr.Plot()
                 
-            with gr.Tab("Quality Analysis"):
-                gr.Plot(self.get_quality_analysis)
+            with gr.Tab("Quality Analysis") as quality_tab:
+                plots["quality_analysis"] = gr.Plot()
                 
             with gr.Tab("Data Explorer"):
                 query = gr.Textbox(label="SQL Query")
                 output = gr.DataFrame()
-                
-                def execute_query(query):
-                    try:
-                        return pd.read_sql(query, self.conn)
-                    except Exception as e:
-                        return pd.DataFrame({'error': [str(e)]})
-                
-                query.submit(execute_query, query, output)
+                query.submit(self.execute_query_async, query, output)
+
+            with gr.Tab("Similar Listings"):
+                item_id = gr.Number(label="Item ID", precision=0)
+                k = gr.Slider(1, 50, value=10, step=1, label="Results")
+                similar_output = gr.DataFrame()
+                item_id.submit(self.get_similar_listings_async, [item_id, k], similar_output)
+
+            def loader(name):
+                async def load():
+                    return await self.load_figure(name)
+                return load
+
+            # The first tab is visible on load; the others load when selected
+            interface.load(loader("price_trends"), None, plots["price_trends"])
+            price_tab.select(loader("price_trends"), None, plots["price_trends"])
+            category_tab.select(loader("category_distribution"), None, plots["category_distribution"])
+            quality_tab.select(loader("quality_analysis"), None, plots["quality_analysis"])
+
+            poll_outputs = [figures_version] + [plots[name] for name in self.FIGURES]
+            if hasattr(gr, "Timer"):
+                gr.Timer(self.refresh_interval).tick(self.poll_figures, figures_version, poll_outputs)
+            else:
+                interface.load(self.poll_figures, figures_version, poll_outputs,
+                               every=self.refresh_interval)
 
         return interface
 
 def main():
+    setup_logging(stage='dashboard')
     dashboard = EbayDashboard()
+    dashboard.start_background_refresh()
     interface = dashboard.create_interface()
+    interface.queue()
     interface.launch(server_name="0.0.0.0", server_port=7860)
 
 if __name__ == "__main__":
@@ -0,0 +1,211 @@
+import io
+import os
+import json
+import mmap
+import tarfile
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# One fixed-width row per sample in a shard's `.idx.npy` sidecar
+INDEX_DTYPE = np.dtype([
+    ('image_offset', '<u8'),
+    ('image_size', '<u8'),
+    ('text_offset', '<u8'),
+    ('text_size', '<u8'),
+    ('path_offset', '<u8'),
+    ('path_size', '<u8'),
+])
+
+
+class ShardedDatasetWriter:
+    """Write image-text pairs into size-bounded tar shards.
+
+    Shards follow the WebDataset layout (`<key>.<ext>` image member next to a
+    `<key>.txt` text member) so they can be streamed by standard tooling.
+    Image bytes are copied straight from disk into the tar, never
+    base64-encoded or held in memory for the whole dataset. Each shard gets a
+    fixed-width `.idx.npy` sidecar (see `INDEX_DTYPE`) recording the byte
+    offsets of every member, plus a `.paths` file holding the source image
+    paths, which lets `ShardedDatasetReader` mmap the shard and slice samples
+    out directly.
+    """
+
+    def __init__(self, output_dir: str,
+                 max_shard_bytes: int = 256 * 1024 * 1024,
+                 max_workers: int = 4,
+                 prefix: str = "shard"):
+        self.logger = logging.getLogger(__name__)
+        self.output_dir = Path(output_dir)
+        self.max_shard_bytes = max_shard_bytes
+        self.max_workers = max_workers
+        self.prefix = prefix
+
+    def plan_shards(self, pairs: Iterable[Tuple[str, str]]) -> List[List[Tuple[str, str, int]]]:
+        """Group pairs into shards whose image bytes stay under the size bound."""
+        shards = []
+        current: List[Tuple[str, str, int]] = []
+        current_bytes = 0
+        for image_path, text in pairs:
+            try:
+                size = os.path.getsize(image_path)
+            except OSError as e:
+                self.logger.error(f"Skipping image {image_path}: {str(e)}")
+                continue
+            if current and current_bytes + size > self.max_shard_bytes:
+                shards.append(current)
+                current, current_bytes = [], 0
+            current.append((image_path, text, size))
+            current_bytes += size
+        if current:
+            shards.append(current)
+        return shards
+
+    def _write_shard(self, shard_id: int, start_index: int,
+                     samples: List[Tuple[str, str, int]]) -> Dict:
+        name = f"{self.prefix}-{shard_id:05d}"
+        tar_path = self.output_dir / f"{name}.tar"
+        idx_path = self.output_dir / f"{name}.idx.npy"
+        paths_path = self.output_dir / f"{name}.paths"
+        tmp_tar = tar_path.with_suffix(".tar.tmp")
+        tmp_idx = idx_path.with_suffix(".npy.tmp")
+        tmp_paths = paths_path.with_suffix(".paths.tmp")
+
+        index = np.zeros(len(samples), dtype=INDEX_DTYPE)
+        path_offset = 0
+        with tarfile.open(tmp_tar, 'w', format=tarfile.USTAR_FORMAT) as tar, \
+                open(tmp_paths, 'wb') as paths:
+            for offset, (image_path, text, size) in enumerate(samples):
+                key = f"{start_index + offset:09d}"
+                ext = Path(image_path).suffix.lstrip('.').lower() or 'bin'
+
+                # USTAR headers for these short names are exactly one block,
+                # so member data starts one block after the current offset
+                image_offset = tar.offset + tarfile.BLOCKSIZE
+                image_info = tarfile.TarInfo(f"{key}.{ext}")
+                image_info.size = size
+                with open(image_path, 'rb') as image_file:
+                    tar.addfile(image_info, image_file)
+
+                text_bytes = text.encode('utf-8')
+                text_offset = tar.offset + tarfile.BLOCKSIZE
+                text_info = tarfile.TarInfo(f"{key}.txt")
+                text_info.size = len(text_bytes)
+                tar.addfile(text_info, io.BytesIO(text_bytes))
+
+                path_bytes = str(image_path).encode('utf-8')
+                paths.write(path_bytes)
+                index[offset] = (image_offset, size, text_offset, len(text_bytes),
+                                 path_offset, len(path_bytes))
+                path_offset += len(path_bytes)
+
+        with open(tmp_idx, 'wb') as f:
+            np.save(f, index)
+
+        os.replace(tmp_tar, tar_path)
+        os.replace(tmp_paths, paths_path)
+        os.replace(tmp_idx, idx_path)
+        self.logger.info(f"Wrote shard {tar_path.name} with {len(samples)} samples")
+        return {'tar': tar_path.name, 'index': idx_path.name, 'paths': paths_path.name,
+                'count': len(samples)}
+
+    def write(self, image_paths: List[str], texts: List[str]) -> Dict:
+        """Write all pairs and return the dataset manifest."""
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            shards = self.plan_shards(zip(image_paths, texts))
+
+            starts = []
+            total = 0
+            for samples in shards:
+                starts.append(total)
+                total += len(samples)
+
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                written = list(executor.map(self._write_shard, range(len(shards)), starts, shards))
+
+            manifest = {'format': 'webdataset-tar', 'count': total, 'shards': written}
+            with open(self.output_dir / "manifest.json", 'w') as f:
+                json.dump(manifest, f, indent=2)
+
+            self.logger.info(f"Image-text dataset written: {total} samples in {len(shards)} shards")
+            return manifest
+        except Exception as e:
+            self.logger.error(f"Error writing image-text dataset: {str(e)}")
+            raise
+
+
+class ShardedDatasetReader:
+    """Random access to datasets written by `ShardedDatasetWriter`.
+
+    Shard indexes are memory-mapped numpy arrays, so opening a dataset costs
+    a few pages per shard rather than one Python object per sample.
+    """
+
+    def __init__(self, dataset_dir: str):
+        self.dataset_dir = Path(dataset_dir)
+        with open(self.dataset_dir / "manifest.json") as f:
+            self.manifest = json.load(f)
+
+        shards = self.manifest['shards']
+        self._indexes: List[np.ndarray] = [
+            np.load(self.dataset_dir / shard['index'], mmap_mode='r') for shard in shards
+        ]
+        counts = np.array([len(index) for index in self._indexes], dtype=np.int64)
+        self._starts = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.int64)
+        self._maps: List[Optional[mmap.mmap]] = [None] * len(shards)
+        self._path_maps: List[Optional[mmap.mmap]] = [None] * len(shards)
+        self._count = int(counts.sum())
+
+    def _open_map(self, maps: List[Optional[mmap.mmap]], shard_id: int, key: str) -> mmap.mmap:
+        if maps[shard_id] is None:
+            path = self.dataset_dir / self.manifest['shards'][shard_id][key]
+            with open(path, 'rb') as f:
+                maps[shard_id] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return maps[shard_id]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> Dict:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        shard_id = int(np.searchsorted(self._starts, index, side='right')) - 1
+        entry = self._indexes[shard_id][index - self._starts[shard_id]]
+        data = self._open_map(self._maps, shard_id, 'tar')
+        paths = self._open_map(self._path_maps, shard_id, 'paths')
+
+        image_start = int(entry['image_offset'])
+        text_start = int(entry['text_offset'])
+        path_start = int(entry['path_offset'])
+        return {
+            'key': f"{index:09d}",
+            'image_path': paths[path_start:path_start + int(entry['path_size'])].decode('utf-8'),
+            'image': data[image_start:image_start + int(entry['image_size'])],
+            'text': data[text_start:text_start + int(entry['text_size'])].decode('utf-8')
+        }
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield self[index]
+
+    def close(self):
+        for maps in (self._maps, self._path_maps):
+            for i, data in enumerate(maps):
+                if data is not None:
+                    data.close()
+                    maps[i] = None
+
+
+def write_image_text_shards(image_paths: List[str], texts: List[str], output_dir: str,
+                            max_shard_bytes: int = 256 * 1024 * 1024,
+                            max_workers: int = 4) -> Dict:
+    """Convenience wrapper used by the Lua bridge."""
+    writer = ShardedDatasetWriter(output_dir, max_shard_bytes=max_shard_bytes,
+                                  max_workers=max_workers)
+    return writer.write(image_paths, texts)
@@ -0,0 +1,437 @@
+import os
+import json
+import re
+import sqlite3
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from scipy import sparse
+
+
+class KeywordIndex:
+    """Corpus-level keyword statistics built from the `seo` table.
+
+    Keeps document frequency per keyword, keyword counts per category (for
+    per-category TF-IDF) and a sparse keyword co-occurrence matrix. Rows are
+    consumed incrementally by `seo.id`, so repeated calls to `update` only
+    fold in listings written since the previous call.
+    """
+
+    _token_re = re.compile(r"[a-z0-9]+")
+
+    def __init__(self, db_path: str = "/app/data/ebay_data.db",
+                 batch_size: int = 1000,
+                 merge_threshold: int = 5_000_000):
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.merge_threshold = merge_threshold
+
+        self.vocab: Dict[str, int] = {}
+        self.categories: Dict[str, int] = {}
+        self.doc_count = 0
+        self.last_seo_id = 0
+        self.doc_freq = np.zeros(0, dtype=np.int64)
+        self.category_counts = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self.category_docs = np.zeros(0, dtype=np.int64)
+        self.cooccurrence = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self._phrases: Dict[str, int] = {}
+        self._phrases_size = 0
+        self._max_phrase_len = 1
+
+    @staticmethod
+    def normalize(keyword: str) -> str:
+        """Normalize a keyword for lookup."""
+        return ' '.join(keyword.lower().split())
+
+    @staticmethod
+    def _pending_id(committed: Dict[str, int], pending: Dict[str, int], key: str) -> int:
+        """Id for `key`, allocating new ids in `pending` until the batch is merged."""
+        if key in committed:
+            return committed[key]
+        if key not in pending:
+            pending[key] = len(committed) + len(pending)
+        return pending[key]
+
+    @staticmethod
+    def _grow(array: np.ndarray, size: int) -> np.ndarray:
+        if array.shape[0] >= size:
+            return array.copy()
+        return np.concatenate([array, np.zeros(size - array.shape[0], dtype=array.dtype)])
+
+    def _parse_row(self, keywords_json: Optional[str],
+                   metadata_json: Optional[str]):
+        """Extract a deduplicated keyword list and category from a seo row."""
+        try:
+            keywords = json.loads(keywords_json) if keywords_json else []
+        except (TypeError, ValueError):
+            keywords = str(keywords_json).split(',')
+        if isinstance(keywords, str):
+            keywords = keywords.split(',')
+
+        try:
+            metadata = json.loads(metadata_json) if metadata_json else {}
+        except (TypeError, ValueError):
+            metadata = {}
+        category = (metadata or {}).get('category') or 'unknown'
+
+        terms = []
+        seen = set()
+        for keyword in keywords:
+            term = self.normalize(str(keyword))
+            if term and term not in seen:
+                seen.add(term)
+                terms.append(term)
+        return terms, str(category)
+
+    def _new_pending(self) -> Dict:
+        return {
+            'documents': 0,
+            'vocab': {},
+            'categories': {},
+            'term_ids': [],
+            'category_ids': [],
+            'cat_rows': [],
+            'cat_cols': [],
+            'cooc_rows': [],
+            'cooc_cols': [],
+            'cooc_data': [],
+            'size': 0,
+        }
+
+    def _accumulate(self, documents: List[Dict], pending: Dict):
+        """Collect the COO triplets for a batch without touching the totals."""
+        doc_rows, doc_cols = [], []
+        for doc_idx, doc in enumerate(documents):
+            term_ids = sorted({
+                self._pending_id(self.vocab, pending['vocab'], term)
+                for term in (self.normalize(k) for k in doc.get('keywords', []))
+                if term
+            })
+            cat_id = self._pending_id(self.categories, pending['categories'],
+                                      str(doc.get('category') or 'unknown'))
+            pending['category_ids'].append(cat_id)
+            doc_rows.extend([doc_idx] * len(term_ids))
+            doc_cols.extend(term_ids)
+            pending['cat_rows'].extend([cat_id] * len(term_ids))
+            pending['cat_cols'].extend(term_ids)
+
+        # Binary document-term matrix for this batch only
+        doc_terms = sparse.csr_matrix(
+            (np.ones(len(doc_rows), dtype=np.float32), (doc_rows, doc_cols)),
+            shape=(len(documents), len(self.vocab) + len(pending['vocab']))
+        )
+        cooc = (doc_terms.T @ doc_terms).tocoo()
+        off_diagonal = cooc.row != cooc.col
+
+        pending['documents'] += len(documents)
+        pending['term_ids'].append(np.asarray(doc_cols, dtype=np.int64))
+        pending['cooc_rows'].append(cooc.row[off_diagonal])
+        pending['cooc_cols'].append(cooc.col[off_diagonal])
+        pending['cooc_data'].append(cooc.data[off_diagonal])
+        pending['size'] += int(off_diagonal.sum()) + len(doc_cols)
+
+    def _merge(self, pending: Dict):
+        """Add collected triplets to the accumulated statistics in one pass.
+
+        New arrays are built first and the vocabulary is extended last, so a
+        failed batch leaves the index untouched and concurrent readers never
+        see ids beyond the arrays.
+        """
+        if not pending['documents']:
+            return
+
+        n_terms = len(self.vocab) + len(pending['vocab'])
+        n_cats = len(self.categories) + len(pending['categories'])
+
+        doc_freq = self._grow(self.doc_freq, n_terms)
+        doc_freq += np.bincount(np.concatenate(pending['term_ids']), minlength=n_terms)
+        category_docs = self._grow(self.category_docs, n_cats)
+        category_docs += np.bincount(pending['category_ids'], minlength=n_cats)
+
+        category_counts = self.category_counts.copy()
+        category_counts.resize((n_cats, n_terms))
+        category_counts = (category_counts + sparse.coo_matrix(
+            (np.ones(len(pending['cat_rows']), dtype=np.float32),
+             (pending['cat_rows'], pending['cat_cols'])),
+            shape=(n_cats, n_terms)
+        ).tocsr()).tocsr()
+
+        cooccurrence = self.cooccurrence.copy()
+        cooccurrence.resize((n_terms, n_terms))
+        cooccurrence = (cooccurrence + sparse.coo_matrix(
+            (np.concatenate(pending['cooc_data']),
+             (np.concatenate(pending['cooc_rows']), np.concatenate(pending['cooc_cols']))),
+            shape=(n_terms, n_terms)
+        ).tocsr()).tocsr()
+
+        category_counts.sort_indices()
+        cooccurrence.sort_indices()
+        self.doc_freq = doc_freq
+        self.category_docs = category_docs
+        self.category_counts = category_counts
+        self.cooccurrence = cooccurrence
+        self.doc_count += pending['documents']
+        self.categories.update(pending['categories'])
+        self.vocab.update(pending['vocab'])
+
+    def add_documents(self, documents: List[Dict]):
+        """Fold a batch of documents into the statistics.
+
+        Each document is a dict with `keywords` (list of str) and an optional
+        `category`.
+        """
+        if not documents:
+            return
+        pending = self._new_pending()
+        self._accumulate(documents, pending)
+        self._merge(pending)
+
+    def update(self) -> int:
+        """Read new rows from the `seo` table and fold them in.
+
+        Batches are collected as COO triplets and merged into the matrices
+        once per call (or every `merge_threshold` entries for large
+        backfills). Returns the number of rows consumed.
+        """
+        consumed = 0
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                pending = self._new_pending()
+                last_seo_id = self.last_seo_id
+                while True:
+                    rows = conn.execute(
+                        "SELECT id, keywords, metadata FROM seo "
+                        "WHERE id > ? ORDER BY id LIMIT ?",
+                        (last_seo_id, self.batch_size)
+                    ).fetchall()
+                    if not rows:
+                        break
+
+                    documents = []
+                    for seo_id, keywords_json, metadata_json in rows:
+                        terms, category = self._parse_row(keywords_json, metadata_json)
+                        documents.append({'keywords': terms, 'category': category})
+
+                    self._accumulate(documents, pending)
+                    last_seo_id = rows[-1][0]
+                    consumed += len(rows)
+
+                    if pending['size'] >= self.merge_threshold:
+                        self._merge(pending)
+                        self.last_seo_id = last_seo_id
+                        pending = self._new_pending()
+
+                self._merge(pending)
+                self.last_seo_id = last_seo_id
+            finally:
+                conn.close()
+
+            if consumed:
+                self.logger.info(f"Keyword index updated with {consumed} SEO rows")
+            return consumed
+        except Exception as e:
+            self.logger.error(f"Keyword index update failed: {str(e)}")
+            raise
+
+    @staticmethod
+    def _row_values(matrix: sparse.csr_matrix, row: int, cols: np.ndarray) -> np.ndarray:
+        """`matrix[row, cols]` by binary search in the row's sorted indices.
+
+        scipy's column fancy-indexing costs O(number of columns), which
+        dominates `rank_keywords` on a large vocabulary.
+        """
+        start, stop = matrix.indptr[row], matrix.indptr[row + 1]
+        indices = matrix.indices[start:stop]
+        values = np.zeros(len(cols), dtype=np.float64)
+        if not len(indices):
+            return values
+        positions = np.minimum(np.searchsorted(indices, cols), len(indices) - 1)
+        hits = indices[positions] == cols
+        values[hits] = matrix.data[start:stop][positions[hits]]
+        return values
+
+    def idf(self, ids: Optional[np.ndarray] = None) -> np.ndarray:
+        """Smoothed inverse document frequency for `ids` (default: every term)."""
+        doc_freq = self.doc_freq if ids is None else self.doc_freq[ids]
+        return np.log((1 + self.doc_count) / (1 + doc_freq)) + 1
+
+    def category_tfidf(self, category: str, ids: Optional[np.ndarray] = None) -> np.ndarray:
+        """TF-IDF weights within a category for `ids` (default: every term)."""
+        size = len(self.vocab) if ids is None else len(ids)
+        cat_id = self.categories.get(str(category))
+        if cat_id is None or self.category_docs[cat_id] == 0:
+            return np.zeros(size, dtype=np.float32)
+        if ids is None:
+            tf = self.category_counts.getrow(cat_id).toarray().ravel()[:size]
+        else:
+            tf = self._row_values(self.category_counts, cat_id, ids)
+        tf = tf / self.category_docs[cat_id]
+        return tf * self.idf(ids if ids is not None else np.arange(size))
+
+    def _phrase_lookup(self) -> Dict[str, int]:
+        """Vocab keyed by tokenized form, so `"Film-Camera"` matches `film camera`."""
+        if self._phrases_size != len(self.vocab):
+            self._phrases = {}
+            self._max_phrase_len = 1
+            for term, term_id in self.vocab.items():
+                tokens = self._token_re.findall(term)
+                if tokens:
+                    self._phrases.setdefault(' '.join(tokens), term_id)
+                    self._max_phrase_len = max(self._max_phrase_len, len(tokens))
+            self._phrases_size = len(self.vocab)
+        return self._phrases
+
+    def _feature_terms(self, item_features: Dict) -> List[int]:
+        """Vocabulary ids of keywords (including phrases) in the item's own text."""
+        phrases = self._phrase_lookup()
+        parts = [
+            str(item_features.get('title', '')),
+            str(item_features.get('brand', '') or ''),
+        ]
+        parts.extend(str(a) for a in item_features.get('visual_attributes', []) or [])
+
+        ids = set()
+        # Match within each part so n-grams never span title and attributes
+        for part in parts:
+            tokens = self._token_re.findall(part.lower())
+            for n in range(1, min(self._max_phrase_len, len(tokens)) + 1):
+                for start in range(len(tokens) - n + 1):
+                    term_id = phrases.get(' '.join(tokens[start:start + n]))
+                    if term_id is not None:
+                        ids.add(term_id)
+        return sorted(ids)
+
+    def rank_keywords(self, item_features: Dict, candidates: List[str]) -> List[str]:
+        """Rank candidate keywords by how relevant and distinctive they are.
+
+        The score combines per-category TF-IDF, global IDF (so catalog-wide
+        filler words sink) and co-occurrence with terms from the item's own
+        title/attributes. Unknown candidates keep their original order after
+        the known ones.
+        """
+        terms = []
+        seen = set()
+        for candidate in candidates:
+            term = self.normalize(str(candidate))
+            if term and term not in seen:
+                seen.add(term)
+                terms.append((term, candidate.strip()))
+
+        if not terms or not self.vocab:
+            return [original for _, original in terms]
+
+        known = [(i, self.vocab[t]) for i, (t, _) in enumerate(terms) if t in self.vocab]
+        if not known:
+            return [original for _, original in terms]
+
+        positions = np.array([i for i, _ in known])
+        ids = np.array([term_id for _, term_id in known])
+
+        # Only the candidates are scored; never materialize vocab-sized arrays
+        idf = self.idf(ids)
+        idf = idf / idf.max()
+
+        cat_weight = self.category_tfidf(item_features.get('category') or 'unknown', ids)
+        if cat_weight.max() > 0:
+            cat_weight = cat_weight / cat_weight.max()
+
+        context = self._feature_terms(item_features)
+        if context:
+            context = np.asarray(context)
+            cooc = np.array([
+                self._row_values(self.cooccurrence, term_id, context).sum() for term_id in ids
+            ])
+            cooc = cooc / np.maximum(self.doc_freq[ids], 1)
+            if cooc.max() > 0:
+                cooc = cooc / cooc.max()
+        else:
+            cooc = np.zeros(len(ids))
+
+        scores = 0.5 * cat_weight + 0.3 * idf + 0.2 * cooc
+        # Stable sort keeps the generator's order as a tie-breaker
+        order = np.argsort(-scores, kind='stable')
+
+        ranked = [terms[positions[i]][1] for i in order]
+        known_positions = set(positions.tolist())
+        ranked.extend(original for i, (_, original) in enumerate(terms)
+                      if i not in known_positions)
+        return ranked
+
+    def save(self, path: str):
+        """Persist the index so it can be resumed incrementally.
+
+        Each file is replaced atomically and `state.json` goes last, so a
+        concurrent `load` sees arrays at least as new as its vocabulary.
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+
+        def replace(name: str, write):
+            tmp_path = path / f".{name}.tmp"
+            with open(tmp_path, 'wb') as f:
+                write(f)
+            os.replace(tmp_path, path / name)
+
+        replace("category_counts.npz", lambda f: sparse.save_npz(f, self.category_counts))
+        replace("cooccurrence.npz", lambda f: sparse.save_npz(f, self.cooccurrence))
+        replace("doc_freq.npy", lambda f: np.save(f, self.doc_freq))
+        replace("category_docs.npy", lambda f: np.save(f, self.category_docs))
+        state = json.dumps({
+            'vocab': self.vocab,
+            'categories': self.categories,
+            'doc_count': self.doc_count,
+            'last_seo_id': self.last_seo_id
+        }).encode('utf-8')
+        replace("state.json", lambda f: f.write(state))
+
+    @classmethod
+    def load(cls, path: str, db_path: str = "/app/data/ebay_data.db") -> "KeywordIndex":
+        """Load a previously saved index."""
+        path = Path(path)
+        index = cls(db_path=db_path)
+        with open(path / "state.json") as f:
+            state = json.load(f)
+        index.vocab = state['vocab']
+        index.categories = state['categories']
+        index.doc_count = state['doc_count']
+        index.last_seo_id = state['last_seo_id']
+
+        # Arrays saved after this state.json may be larger; trim them to match
+        n_terms, n_cats = len(index.vocab), len(index.categories)
+        index.doc_freq = np.load(path / "doc_freq.npy")[:n_terms]
+        index.category_docs = np.load(path / "category_docs.npy")[:n_cats]
+        index.category_counts = sparse.load_npz(path / "category_counts.npz").tocsr()[:n_cats, :n_terms]
+        index.cooccurrence = sparse.load_npz(path / "cooccurrence.npz").tocsr()[:n_terms, :n_terms]
+        index.category_counts.sort_indices()
+        index.cooccurrence.sort_indices()
+        return index
+
+
+def main():
+    import argparse
+    try:
+        from .logging_setup import setup_logging
+    except ImportError:
+        # Run as a script from python_src/
+        from logging_setup import setup_logging
+
+    parser = argparse.ArgumentParser(description='Fold new SEO rows into the keyword index')
+    parser.add_argument('--db', default='/app/data/ebay_data.db', help='SQLite database')
+    parser.add_argument('--index', default='/app/data/keyword_index', help='Index directory')
+    args = parser.parse_args()
+
+    setup_logging(stage='keyword_index')
+    if (Path(args.index) / "state.json").exists():
+        index = KeywordIndex.load(args.index, db_path=args.db)
+    else:
+        index = KeywordIndex(db_path=args.db)
+    if index.update():
+        index.save(args.index)
+
+
+if __name__ == "__main__":
+    main()
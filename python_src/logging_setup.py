@@ -0,0 +1,276 @@
+import os
+import sys
+import copy
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+import logging.handlers
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    from .metrics import metrics
+except ImportError:
+    # Run as a script from python_src/
+    from metrics import metrics
+
+# Attributes every LogRecord has; anything else was passed via `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+DEFAULTS = {
+    # One file per stage: RotatingFileHandler is not safe across processes
+    'file': '/app/logs/{stage}.log',
+    'max_size': '100MB',
+    'backup_count': 10,
+    'format': 'json',
+    'queue_size': 10000,
+    'rate_limits': {'default': 100},
+}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional["DroppingQueueHandler"] = None
+
+
+def parse_size(value) -> int:
+    """Parse sizes such as `100MB` or `512KB` into bytes."""
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip().upper()
+    for suffix, factor in (('GB', 1024 ** 3), ('MB', 1024 ** 2), ('KB', 1024), ('B', 1)):
+        if text.endswith(suffix):
+            return int(float(text[:-len(suffix)]) * factor)
+    return int(text)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including the stage and any `extra=` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'timestamp': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of raising when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Merge args and render the traceback into `exc_text` on the caller thread.
+
+        The base class formats the whole record into `msg` and clears
+        `exc_info`, which would put tracebacks inside `message` and hide them
+        from `JsonFormatter`.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            # Tracebacks hold frames alive; the text is all the writer needs
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            metrics.inc('log_records_dropped_total')
+
+
+class StageFilter(logging.Filter):
+    """Tag records with a default `stage` when the caller did not set one."""
+
+    def __init__(self, stage: str):
+        super().__init__()
+        self.stage = stage
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, 'stage'):
+            record.stage = self.stage
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """Token-bucket rate limit per call site for high-frequency messages.
+
+    Limits are messages per second, configured per stage with a `default`.
+    Only records below WARNING are limited. The next record that passes from a
+    throttled call site carries a `suppressed` count of what was dropped.
+    """
+
+    def __init__(self, rate_limits: Dict[str, float]):
+        super().__init__()
+        self.rate_limits = dict(rate_limits)
+        self._buckets: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        stage = getattr(record, 'stage', None)
+        rate = self.rate_limits.get(stage, self.rate_limits.get('default'))
+        if not rate:
+            return True
+
+        # f-string messages differ per call, so key on the call site instead
+        key = (stage, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                # [tokens, last refill, suppressed]
+                bucket = self._buckets[key] = [float(rate), now, 0]
+            bucket[0] = min(float(rate), bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                metrics.inc('log_records_suppressed_total', stage=stage)
+                return False
+            bucket[0] -= 1
+            if bucket[2]:
+                record.suppressed = bucket[2]
+                bucket[2] = 0
+        return True
+
+    def pending_suppressed(self) -> Dict[tuple, int]:
+        """Suppressed counts not yet reported on a later record, by call site."""
+        with self._lock:
+            pending = {key: bucket[2] for key, bucket in self._buckets.items() if bucket[2]}
+            for key in pending:
+                self._buckets[key][2] = 0
+        return pending
+
+
+def _load_settings() -> Dict:
+    settings = dict(DEFAULTS)
+    try:
+        try:
+            from .config import config
+        except ImportError:
+            from config import config
+        settings.update(config.get('monitoring', 'logging', default={}) or {})
+        settings['level'] = config.get('app', 'log_level')
+    except Exception:
+        # Logging has to come up even when the config file is unavailable
+        pass
+    return settings
+
+
+def setup_logging(stage: Optional[str] = None,
+                  level: Optional[str] = None,
+                  log_file: Optional[str] = None,
+                  console: bool = True) -> logging.Logger:
+    """Route all logging through a queue to rotating JSON file output.
+
+    Callers only pay for enqueueing a record; formatting and file I/O happen
+    on the listener thread. Settings come from `monitoring.logging` in the
+    config; the level defaults to `LOG_LEVEL`, then `app.log_level`. A
+    `{stage}` placeholder in the file name gives each stage its own file,
+    since rotation is not coordinated between processes. Call once from a
+    process entry point; later calls replace the previous setup.
+    """
+    global _listener, _queue_handler
+
+    settings = _load_settings()
+    stage = stage or Path(sys.argv[0] if sys.argv else '').stem or 'python'
+    log_file = log_file or os.getenv('LOG_FILE') or settings['file']
+    log_file = str(log_file).replace('{stage}', stage)
+    level = level or os.getenv('LOG_LEVEL') or settings.get('level') or 'INFO'
+
+    if settings.get('format') == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s - %(levelname)s - [%(stage)s] %(message)s')
+
+    handlers = []
+    try:
+        log_dir = os.path.dirname(log_file)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file,
+            maxBytes=parse_size(settings['max_size']),
+            backupCount=int(settings['backup_count']),
+            delay=True
+        )
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+    except OSError as e:
+        logging.getLogger(__name__).warning(f"File logging disabled for {log_file}: {str(e)}")
+    if console:
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(formatter)
+        handlers.append(stream_handler)
+
+    shutdown_logging()
+
+    log_queue = queue.Queue(maxsize=int(settings['queue_size']))
+    _queue_handler = DroppingQueueHandler(log_queue)
+    _queue_handler.addFilter(StageFilter(stage))
+    _queue_handler.addFilter(RateLimitFilter(settings.get('rate_limits') or {}))
+
+    root = logging.getLogger()
+    root.setLevel(str(level).upper())
+    root.addHandler(_queue_handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return logging.getLogger()
+
+
+def _report_losses():
+    """Log records lost to the queue bound or rate limits that nothing reported yet."""
+    if _queue_handler is None:
+        return
+    logger = logging.getLogger(__name__)
+    for log_filter in _queue_handler.filters:
+        if isinstance(log_filter, RateLimitFilter):
+            for (stage, pathname, lineno), count in log_filter.pending_suppressed().items():
+                logger.warning(f"Suppressed {count} messages from {pathname}:{lineno}",
+                               extra={'stage': stage, 'suppressed': count})
+    if _queue_handler.dropped:
+        logger.warning(f"Dropped {_queue_handler.dropped} log records: queue full",
+                       extra={'dropped': _queue_handler.dropped})
+        _queue_handler.dropped = 0
+
+
+def shutdown_logging():
+    """Report lost records, flush queued records and stop the listener thread."""
+    global _listener, _queue_handler
+    _report_losses()
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+
+
+metrics.describe('log_records_dropped_total', 'Log records dropped because the queue was full')
+metrics.describe('log_records_suppressed_total', 'Log records suppressed by per-call-site rate limits')
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,263 @@
+import os
+import sys
+import time
+import bisect
+import atexit
+import random
+import cProfile
+import tracemalloc
+import threading
+import functools
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+# Prometheus' default latency buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Labels, extra: Optional[Dict] = None) -> str:
+    items = list(labels) + list((extra or {}).items())
+    if not items:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in items) + '}'
+
+
+class Histogram:
+    """Cumulative histogram of observed values."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """In-process metrics registry with Prometheus text output.
+
+    Disabled unless `PROMETHEUS_ENABLED=true`; while disabled every timer,
+    decorator and counter returns after a single attribute check.
+
+    Each process writes its metrics to `METRICS_DIR/<name>-<pid>.prom`
+    (periodically and at exit) and `metrics_exporter.py` serves the merged
+    files, so short-lived scripts and the Lua-embedded interpreter all
+    report to the same endpoint. The exporter sums series per process name
+    and folds files of exited processes into one archive per name.
+
+    Profiling is opt-in per stage: stages listed in `PROFILE_STAGES` are run
+    under cProfile and tracemalloc for a `PROFILE_SAMPLE_RATE` fraction of
+    calls and the results dumped to `PROFILE_DIR`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self.help: Dict[str, str] = {}
+        self._last_dump = time.monotonic()
+        self._atexit_registered = False
+        self.configure()
+
+    def configure(self, enabled: Optional[bool] = None,
+                  metrics_dir: Optional[str] = None,
+                  dump_interval: Optional[float] = None,
+                  profile_stages: Optional[set] = None,
+                  profile_sample_rate: Optional[float] = None,
+                  profile_dir: Optional[str] = None,
+                  process_name: Optional[str] = None):
+        """Configure from arguments, falling back to environment variables."""
+        if enabled is None:
+            enabled = os.getenv('PROMETHEUS_ENABLED', 'false').lower() == 'true'
+        self.enabled = enabled
+        self.metrics_dir = Path(metrics_dir or os.getenv('METRICS_DIR', '/app/metrics'))
+        self.dump_interval = dump_interval if dump_interval is not None else float(
+            os.getenv('METRICS_DUMP_INTERVAL', '15'))
+        if profile_stages is None:
+            profile_stages = {s for s in os.getenv('PROFILE_STAGES', '').split(',') if s}
+        self.profile_stages = set(profile_stages)
+        self.profile_sample_rate = profile_sample_rate if profile_sample_rate is not None else float(
+            os.getenv('PROFILE_SAMPLE_RATE', '0.01'))
+        self.profile_dir = Path(profile_dir or os.getenv('PROFILE_DIR', str(self.metrics_dir / 'profiles')))
+        self.process_name = (process_name or os.getenv('METRICS_PROCESS_NAME')
+                             or Path(sys.argv[0] if sys.argv else '').stem or 'python')
+
+        if self.enabled and not self._atexit_registered:
+            atexit.register(self.write_textfile)
+            self._atexit_registered = True
+
+    # ---- recording -------------------------------------------------------
+
+    def describe(self, name: str, help_text: str):
+        self.help[name] = help_text
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Increment a counter, e.g. `metrics.inc('items_processed_total', stage='seo')`."""
+        if not self.enabled:
+            return
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """Record a value in a histogram."""
+        if not self.enabled:
+            return
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+        self._maybe_dump()
+
+    @contextmanager
+    def timer(self, stage: str, **labels):
+        """Time a block as `stage_duration_seconds{stage=...}`."""
+        if not self.enabled:
+            yield
+            return
+        with self._maybe_profile(stage):
+            started = time.perf_counter()
+            try:
+                yield
+            except Exception:
+                self.inc('stage_errors_total', stage=stage, **labels)
+                raise
+            finally:
+                self.observe('stage_duration_seconds', time.perf_counter() - started,
+                             stage=stage, **labels)
+
+    def timed(self, stage: str, **labels):
+        """Decorator form of `timer`."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.timer(stage, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    # ---- profiling -------------------------------------------------------
+
+    @contextmanager
+    def _maybe_profile(self, stage: str):
+        if stage not in self.profile_stages or random.random() >= self.profile_sample_rate:
+            yield
+            return
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active (e.g. a concurrent sampled call)
+            yield
+            return
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            snapshot = tracemalloc.take_snapshot()
+            if started_tracing:
+                tracemalloc.stop()
+            self._write_profile(stage, profiler, snapshot)
+
+    def _write_profile(self, stage: str, profiler: cProfile.Profile,
+                       snapshot: tracemalloc.Snapshot):
+        try:
+            self.profile_dir.mkdir(parents=True, exist_ok=True)
+            stem = self.profile_dir / f"{stage}-{os.getpid()}-{int(time.time() * 1000)}"
+            profiler.dump_stats(f"{stem}.prof")
+            snapshot.dump(f"{stem}.tracemalloc")
+        except OSError:
+            # Profiling must never take the pipeline down
+            pass
+
+    # ---- export ----------------------------------------------------------
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items(), key=lambda item: item[0])
+
+        families: Dict[str, list] = {}
+        for (name, labels), value in counters:
+            families.setdefault(name, []).append(f"{name}{_format_labels(labels)} {value}")
+        for name, samples in families.items():
+            lines.append(f"# HELP {name} {self.help.get(name, name)}")
+            lines.append(f"# TYPE {name} counter")
+            lines.extend(samples)
+
+        families = {}
+        for (name, labels), histogram in histograms:
+            samples = families.setdefault(name, [])
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                samples.append(f"{name}_bucket{_format_labels(labels, {'le': bound})} {cumulative}")
+            samples.append(f"{name}_bucket{_format_labels(labels, {'le': '+Inf'})} {histogram.count}")
+            samples.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+            samples.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        for name, samples in families.items():
+            lines.append(f"# HELP {name} {self.help.get(name, name)}")
+            lines.append(f"# TYPE {name} histogram")
+            lines.extend(samples)
+
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def write_textfile(self):
+        """Atomically write this process's metrics to `METRICS_DIR`."""
+        if not self.enabled:
+            return
+        try:
+            self.metrics_dir.mkdir(parents=True, exist_ok=True)
+            path = self.metrics_dir / f"{self.process_name}-{os.getpid()}.prom"
+            tmp_path = path.with_suffix('.prom.tmp')
+            tmp_path.write_text(self.render())
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    def _maybe_dump(self):
+        now = time.monotonic()
+        if now - self._last_dump >= self.dump_interval:
+            self._last_dump = now
+            self.write_textfile()
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+# Global metrics registry
+metrics = Metrics()
+metrics.describe('stage_duration_seconds', 'Time spent per pipeline stage')
+metrics.describe('stage_errors_total', 'Exceptions raised per pipeline stage')
+metrics.describe('items_processed_total', 'Items processed per pipeline stage')
+metrics.describe('bytes_processed_total', 'Bytes read or written per pipeline stage')
+metrics.describe('cache_hits_total', 'Cache hits per cache')
+metrics.describe('cache_misses_total', 'Cache misses per cache')
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+import os
+import re
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+try:
+    from .logging_setup import setup_logging
+except ImportError:
+    # Run as a script from python_src/
+    from logging_setup import setup_logging
+
+
+# `<name>-<pid>.prom` is written by a live process; `<name>.archive.prom`
+# holds the folded totals of that name's exited processes
+_PROCESS_FILE = re.compile(r'^(?P<name>.+)-(?P<pid>\d+)$')
+_ARCHIVE_SUFFIX = '.archive'
+
+Samples = Dict[str, Dict[Tuple[str, str], float]]
+
+
+def _split_stem(stem: str) -> Tuple[str, Optional[int]]:
+    if stem.endswith(_ARCHIVE_SUFFIX):
+        return stem[:-len(_ARCHIVE_SUFFIX)], None
+    match = _PROCESS_FILE.match(stem)
+    if match:
+        return match.group('name'), int(match.group('pid'))
+    return stem, None
+
+
+def _parse_textfile(text: str, process: str, meta: Dict[str, Dict[str, str]], samples: Samples):
+    """Add a textfile's samples to `samples`, summing series seen before."""
+    family = None
+    for line in text.splitlines():
+        if not line:
+            continue
+        if line.startswith('#'):
+            parts = line.split(' ', 3)
+            if len(parts) >= 3 and parts[1] in ('HELP', 'TYPE'):
+                family = parts[2]
+                # Only the first HELP and TYPE per family are valid exposition
+                meta.setdefault(family, {}).setdefault(parts[1], line)
+                samples.setdefault(family, {})
+            continue
+        if family is None:
+            continue
+        series, _, value = line.rpartition(' ')
+        try:
+            value = float(value)
+        except ValueError:
+            continue
+        key = (process, series)
+        samples[family][key] = samples[family].get(key, 0.0) + value
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _render(meta: Dict[str, Dict[str, str]], samples: Samples, process_label: bool) -> str:
+    output = []
+    for family, entry in meta.items():
+        output.extend(entry[kind] for kind in ('HELP', 'TYPE') if kind in entry)
+        for (process, series), value in samples.get(family, {}).items():
+            if process_label:
+                if series.endswith('}'):
+                    series = f'{series[:-1]},process="{process}"}}'
+                else:
+                    series = f'{series}{{process="{process}"}}'
+            output.append(f'{series} {_format_value(value)}')
+    return '\n'.join(output) + '\n' if output else ''
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def compact_textfiles(metrics_dir: Path) -> int:
+    """Fold textfiles of exited processes into `<name>.archive.prom`.
+
+    Counters and histograms are cumulative, so adding a dead process's final
+    values to the archive keeps totals monotonic while the number of files
+    and series stays bounded by the number of process names. Returns the
+    number of files folded.
+    """
+    folded = 0
+    for path in sorted(metrics_dir.glob("*.prom")):
+        name, pid = _split_stem(path.stem)
+        if pid is None or pid == os.getpid() or _pid_alive(pid):
+            continue
+        try:
+            archive = metrics_dir / f"{name}{_ARCHIVE_SUFFIX}.prom"
+            meta, samples = {}, {}
+            for source in (archive, path):
+                if source.exists():
+                    _parse_textfile(source.read_text(), name, meta, samples)
+            tmp_path = archive.with_suffix('.tmp')
+            tmp_path.write_text(_render(meta, samples, process_label=False))
+            os.replace(tmp_path, archive)
+            path.unlink()
+            folded += 1
+        except OSError as e:
+            logging.getLogger(__name__).warning(f"Compacting {path.name} failed: {str(e)}")
+    return folded
+
+
+def merge_textfiles(metrics_dir: Path) -> str:
+    """Merge textfiles, summing each series across processes of the same name.
+
+    Samples are labelled `process="<name>"` without the pid, so repeated
+    short-lived runs of a script add to one series instead of creating a
+    new one per run.
+    """
+    meta: Dict[str, Dict[str, str]] = {}
+    samples: Samples = {}
+    for path in sorted(metrics_dir.glob("*.prom")):
+        name, _ = _split_stem(path.stem)
+        try:
+            text = path.read_text()
+        except OSError:
+            # Compacted between glob and read; its samples are in the archive now
+            continue
+        _parse_textfile(text, name, meta, samples)
+    return _render(meta, samples, process_label=True)
+
+
+def make_handler(metrics_dir: Path, metrics_path: str):
+    # Scrapes may overlap; compaction must not race a concurrent merge
+    lock = threading.Lock()
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != metrics_path:
+                self.send_error(404)
+                return
+            with lock:
+                compact_textfiles(metrics_dir)
+                body = merge_textfiles(metrics_dir).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsHandler
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Serve pipeline metrics to Prometheus')
+    parser.add_argument('--metrics-dir', default=os.getenv('METRICS_DIR', '/app/metrics'),
+                        help='Directory of per-process .prom files')
+    parser.add_argument('--port', type=int, default=int(os.getenv('METRICS_PORT', '9090')),
+                        help='Port to listen on')
+    parser.add_argument('--path', default='/metrics', help='Metrics URL path')
+
+    args = parser.parse_args()
+
+    setup_logging(stage='metrics_exporter')
+    metrics_dir = Path(args.metrics_dir)
+    metrics_dir.mkdir(parents=True, exist_ok=True)
+
+    server = ThreadingHTTPServer(('0.0.0.0', args.port), make_handler(metrics_dir, args.path))
+    logging.info(f"Serving metrics from {metrics_dir} on :{args.port}{args.path}")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
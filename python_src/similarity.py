@@ -0,0 +1,389 @@
+import os
+import json
+import sqlite3
+import logging
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+
+class VectorStore:
+    """Append-only float16 vector matrix backed by a memory-mapped file.
+
+    Vectors are L2-normalized on insert so inner product equals cosine
+    similarity. Search uses an IVF (inverted file) index: k-means centroids
+    partition the vectors into lists and a query only scores the `nprobe`
+    nearest lists. Until the centroids are trained (at `exact_search_limit`
+    vectors) the store falls back to exact, chunked search.
+
+    Training is never triggered by `add`; the writer checks `needs_training`
+    and calls `train` explicitly so queries never pay for it. A store opened
+    with `read_only=True` only searches and picks up the writer's flushes via
+    `reload_if_changed`.
+    """
+
+    def __init__(self, path: str, dim: int, nlist: int = 2048, nprobe: int = 8,
+                 initial_capacity: int = 1024, read_only: bool = False,
+                 retrain_growth: float = 2.0, search_chunk: int = 4096,
+                 exact_search_limit: int = 4096):
+        self.logger = logging.getLogger(__name__)
+        self.path = Path(path)
+        self.dim = dim
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.read_only = read_only
+        self.retrain_growth = retrain_growth
+        self.search_chunk = search_chunk
+        self.exact_search_limit = exact_search_limit
+
+        self.count = 0
+        self.capacity = initial_capacity
+        self.trained_count = 0
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.centroids: Optional[np.ndarray] = None
+        self.assignments = np.zeros(0, dtype=np.int32)
+        self._lists: List[np.ndarray] = []
+        self._row_of: Dict[int, int] = {}
+        self._meta_mtime = None
+
+        if (self.path / "meta.json").exists():
+            self._load()
+        elif read_only:
+            raise FileNotFoundError(f"No vector store at {self.path}")
+        else:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self.vectors = self._open_matrix(self.capacity, mode='w+')
+
+    # ---- persistence -------------------------------------------------
+
+    def _open_matrix(self, capacity: int, mode: Optional[str] = None) -> np.memmap:
+        mode = mode or ('r' if self.read_only else 'r+')
+        return np.memmap(self.path / "vectors.f16", dtype=np.float16,
+                         mode=mode, shape=(capacity, self.dim))
+
+    def _load(self):
+        meta_path = self.path / "meta.json"
+        mtime = meta_path.stat().st_mtime_ns
+        with open(meta_path) as f:
+            meta = json.load(f)
+        with np.load(self.path / "state.npz") as state:
+            ids = state['ids']
+            centroids = state['centroids'] if 'centroids' in state else None
+            assignments = state['assignments'] if 'assignments' in state else None
+
+        # meta.json is written last, so the state may be ahead of it but never behind
+        count = min(meta['count'], len(ids))
+        self.dim = meta['dim']
+        self.nlist = meta['nlist']
+        self.capacity = meta['capacity']
+        self.trained_count = meta.get('trained_count', 0)
+        self.vectors = self._open_matrix(self.capacity)
+        self.count = count
+        self.ids = ids[:count]
+        self._row_of = {int(item_id): row for row, item_id in enumerate(self.ids)}
+
+        if centroids is not None:
+            self.centroids = centroids
+            self.assignments = assignments[:count]
+            self._build_lists()
+        else:
+            self.centroids = None
+            self.assignments = np.zeros(0, dtype=np.int32)
+            self._lists = []
+        self._meta_mtime = mtime
+
+    def reload_if_changed(self) -> bool:
+        """Reload state flushed by a writer process. Returns True if reloaded."""
+        try:
+            mtime = (self.path / "meta.json").stat().st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self._meta_mtime:
+            return False
+        self._load()
+        return True
+
+    def _replace(self, name: str, write: Callable):
+        """Write a state file atomically so readers never see a partial file."""
+        tmp_path = self.path / f".{name}.tmp"
+        with open(tmp_path, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, self.path / name)
+
+    def flush(self):
+        """Write vectors and index state to disk."""
+        self.vectors.flush()
+        state = {'ids': self.ids}
+        if self.centroids is not None:
+            state['centroids'] = self.centroids
+            state['assignments'] = self.assignments
+        self._replace("state.npz", lambda f: np.savez(f, **state))
+        meta = json.dumps({
+            'dim': self.dim,
+            'nlist': self.nlist,
+            'count': self.count,
+            'capacity': self.capacity,
+            'trained_count': self.trained_count
+        }).encode('utf-8')
+        self._replace("meta.json", lambda f: f.write(meta))
+
+    def _grow(self, needed: int):
+        """Double the backing file until it holds `needed` rows."""
+        if needed <= self.capacity:
+            return
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        self.vectors.flush()
+        del self.vectors
+        with open(self.path / "vectors.f16", 'r+b') as f:
+            f.truncate(capacity * self.dim * np.dtype(np.float16).itemsize)
+        self.capacity = capacity
+        self.vectors = self._open_matrix(capacity)
+
+    # ---- IVF ---------------------------------------------------------
+
+    def _build_lists(self):
+        order = np.argsort(self.assignments, kind='stable')
+        nlist = len(self.centroids)
+        bounds = np.searchsorted(self.assignments[order], np.arange(nlist + 1))
+        self._lists = [order[bounds[i]:bounds[i + 1]] for i in range(nlist)]
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def needs_training(self) -> bool:
+        """True once exact search gets too slow, or the catalog has grown
+        `retrain_growth` times past the data the centroids were fitted on."""
+        if self.centroids is None:
+            return self.count >= min(self.exact_search_limit, self.nlist * 39)
+        return self.count >= self.trained_count * self.retrain_growth
+
+    def train(self, iterations: int = 10, sample_size: int = 100000, seed: int = 0):
+        """Train IVF centroids with spherical k-means over a sample."""
+        rng = np.random.default_rng(seed)
+        sample_rows = rng.choice(self.count, size=min(sample_size, self.count), replace=False)
+        sample = np.asarray(self.vectors[np.sort(sample_rows)], dtype=np.float32)
+
+        if not len(sample):
+            raise ValueError("Cannot train an empty vector store")
+        # At least 39 points per list for stable k-means (the faiss heuristic);
+        # smaller catalogs get fewer lists and grow into `nlist` on retrain
+        nlist = max(1, min(self.nlist, len(sample) // 39, len(sample)))
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)]
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Keep the previous centroid for empty clusters
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+        self.centroids = centroids.astype(np.float32)
+
+        # Assign every stored vector in chunks to bound memory
+        assignments = np.empty(self.count, dtype=np.int32)
+        for start in range(0, self.count, 65536):
+            stop = min(start + 65536, self.count)
+            assignments[start:stop] = self._assign(
+                np.asarray(self.vectors[start:stop], dtype=np.float32))
+        self.assignments = assignments
+        self.trained_count = self.count
+        self._build_lists()
+        self.logger.info(f"Trained IVF index with {nlist} lists over {self.count} vectors")
+
+    # ---- public API --------------------------------------------------
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, item_id: int) -> bool:
+        return int(item_id) in self._row_of
+
+    def add(self, item_ids: List[int], vectors: np.ndarray):
+        """Append vectors for new items, assigning them to existing lists."""
+        if self.read_only:
+            raise PermissionError("Vector store is opened read-only")
+        vectors = np.asarray(vectors, dtype=np.float32)
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+        start = self.count
+        stop = start + len(vectors)
+        self._grow(stop)
+        self.vectors[start:stop] = vectors.astype(np.float16)
+        self.ids = np.concatenate([self.ids, np.asarray(item_ids, dtype=np.int64)])
+        for row, item_id in enumerate(item_ids, start=start):
+            self._row_of[int(item_id)] = row
+        self.count = stop
+
+        if self.centroids is not None:
+            labels = self._assign(vectors)
+            self.assignments = np.concatenate([self.assignments, labels])
+            rows = np.arange(start, stop)
+            for list_id in np.unique(labels):
+                self._lists[list_id] = np.concatenate(
+                    [self._lists[list_id], rows[labels == list_id]])
+
+    def vector(self, item_id: int) -> np.ndarray:
+        return np.asarray(self.vectors[self._row_of[int(item_id)]], dtype=np.float32)
+
+    def search(self, query: np.ndarray, k: int = 10) -> List[Dict]:
+        """Return the k most similar stored items to `query`."""
+        query = np.asarray(query, dtype=np.float32).ravel()
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+        if self.centroids is None:
+            rows = np.arange(self.count)
+        else:
+            probe = np.argsort(-(self.centroids @ query))[:self.nprobe]
+            rows = np.sort(np.concatenate([self._lists[i] for i in probe]))
+        if len(rows) == 0:
+            return []
+
+        # Score in chunks with a running top-k so memory stays bounded by the
+        # chunk size; the float16 matrix is never converted as a whole
+        k = min(k, len(rows))
+        best_rows = np.zeros(0, dtype=np.int64)
+        best_scores = np.zeros(0, dtype=np.float32)
+        for start in range(0, len(rows), self.search_chunk):
+            chunk = rows[start:start + self.search_chunk]
+            if self.centroids is None:
+                # Contiguous rows: a slice of the memmap avoids a fancy-index copy
+                candidates = self.vectors[chunk[0]:chunk[-1] + 1]
+            else:
+                candidates = self.vectors[chunk]
+            scores = np.asarray(candidates, dtype=np.float32) @ query
+            best_rows = np.concatenate([best_rows, chunk])
+            best_scores = np.concatenate([best_scores, scores])
+            if len(best_scores) > k:
+                keep = np.argpartition(-best_scores, k - 1)[:k]
+                best_rows, best_scores = best_rows[keep], best_scores[keep]
+
+        order = np.argsort(-best_scores, kind='stable')
+        return [
+            {'item_id': int(self.ids[best_rows[i]]), 'score': float(best_scores[i])}
+            for i in order
+        ]
+
+
+class SimilarListingIndex:
+    """Similar-listing search over item titles and SEO descriptions.
+
+    Embedding and IVF training happen in `update`/`retrain`, which run as a
+    batch job (`python -m python_src.similarity`). Readers such as the
+    dashboard open the index with `read_only=True` and only call `similar`.
+    """
+
+    def __init__(self, db_path: str = "/app/data/ebay_data.db",
+                 index_path: str = "/app/data/similarity_index",
+                 encoder: Optional[Callable[[List[str]], np.ndarray]] = None,
+                 dim: int = 768,
+                 batch_size: int = 64,
+                 read_only: bool = False,
+                 **store_options):
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.read_only = read_only
+        self._encoder = encoder
+        self.store = VectorStore(index_path, dim=dim, read_only=read_only, **store_options)
+
+    @property
+    def encoder(self) -> Callable[[List[str]], np.ndarray]:
+        if self._encoder is None:
+            # Loading the model is expensive; only do it when embedding
+            from .generate_seo import SEOGenerator
+            self._encoder = SEOGenerator().encode
+        return self._encoder
+
+    def update(self) -> int:
+        """Embed items added since the last update.
+
+        Trains the IVF centroids once enough vectors exist and retrains them
+        when the catalog has outgrown them. Returns the number of items
+        embedded.
+        """
+        last_id = int(self.store.ids.max()) if len(self.store) else 0
+        embedded = 0
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                while True:
+                    rows = conn.execute("""
+                        SELECT i.id, i.title,
+                               (SELECT s.description FROM seo s
+                                WHERE s.item_id = i.id
+                                ORDER BY s.id DESC LIMIT 1)
+                        FROM items i
+                        WHERE i.id > ?
+                        ORDER BY i.id
+                        LIMIT ?
+                    """, (last_id, self.batch_size)).fetchall()
+                    if not rows:
+                        break
+
+                    texts = [f"{title or ''} {description or ''}".strip()
+                             for _, title, description in rows]
+                    self.store.add([row[0] for row in rows], self.encoder(texts))
+                    last_id = rows[-1][0]
+                    embedded += len(rows)
+            finally:
+                conn.close()
+
+            if self.store.needs_training():
+                self.store.train()
+            elif not embedded:
+                return 0
+
+            self.store.flush()
+            if embedded:
+                self.logger.info(f"Similarity index updated with {embedded} items")
+            return embedded
+        except Exception as e:
+            self.logger.error(f"Similarity index update failed: {str(e)}")
+            raise
+
+    def retrain(self):
+        """Refit the IVF centroids over the current catalog."""
+        try:
+            self.store.train()
+            self.store.flush()
+        except Exception as e:
+            self.logger.error(f"Similarity index retrain failed: {str(e)}")
+            raise
+
+    def similar(self, item_id: int, k: int = 10) -> List[Dict]:
+        """Return the k listings most similar to `item_id`."""
+        if self.read_only:
+            self.store.reload_if_changed()
+        if item_id not in self.store:
+            raise KeyError(f"Item {item_id} is not in the similarity index")
+        results = self.store.search(self.store.vector(item_id), k + 1)
+        return [r for r in results if r['item_id'] != int(item_id)][:k]
+
+
+def main():
+    import argparse
+    try:
+        from .logging_setup import setup_logging
+    except ImportError:
+        # Run as a script from python_src/
+        from logging_setup import setup_logging
+
+    parser = argparse.ArgumentParser(description='Embed new listings into the similarity index')
+    parser.add_argument('--db', default='/app/data/ebay_data.db', help='SQLite database')
+    parser.add_argument('--index', default='/app/data/similarity_index', help='Index directory')
+    parser.add_argument('--retrain', action='store_true',
+                        help='Refit the IVF centroids over the whole catalog')
+    args = parser.parse_args()
+
+    setup_logging(stage='similarity')
+    index = SimilarListingIndex(db_path=args.db, index_path=args.index)
+    index.update()
+    # update() may have just trained over every vector; don't do it twice
+    if args.retrain and index.store.trained_count != len(index.store):
+        index.retrain()
+
+
+if __name__ == "__main__":
+    main()
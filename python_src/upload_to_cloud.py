@@ -7,6 +7,14 @@ from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional
 
+try:
+    from .logging_setup import setup_logging
+    from .metrics import metrics
+except ImportError:
+    # Run as a script from python_src/
+    from logging_setup import setup_logging
+    from metrics import metrics
+
 class CloudUploader:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
@@ -23,6 +31,7 @@ class CloudUploader:
             self.logger.error(f"Failed to initialize cloud clients: {str(e)}")
             raise
 
+    @metrics.timed('cloud_upload')
     def upload_file(self, file_path: str, destination_blob_name: Optional[str] = None) -> str:
         """Upload a file to Google Cloud Storage."""
         try:
@@ -31,12 +40,15 @@ class CloudUploader:
 
             blob = self.bucket.blob(destination_blob_name)
             blob.upload_from_filename(file_path)
+            metrics.inc('items_processed_total', stage='cloud_upload')
+            metrics.inc('bytes_processed_total', os.path.getsize(file_path), stage='cloud_upload')
 
             return f"gs://{self.bucket_name}/{destination_blob_name}"
         except Exception as e:
             self.logger.error(f"Upload failed for {file_path}: {str(e)}")
             raise
 
+    @metrics.timed('image_analysis')
     def analyze_image(self, image_path: str) -> Dict:
         """Analyze image using Google Cloud Vision API."""
         try:
@@ -44,6 +56,8 @@ class CloudUploader:
                 content = image_file.read()
 
             image = vision.Image(content=content)
+            metrics.inc('items_processed_total', stage='image_analysis')
+            metrics.inc('bytes_processed_total', len(content), stage='image_analysis')
             
             # Perform multiple types of analysis
             labels = self.vision_client.label_detection(image=image)
@@ -107,7 +121,7 @@ class CloudUploader:
             raise
 
 if __name__ == "__main__":
-    logging.basicConfig(level=logging.INFO)
+    setup_logging(stage='cloud_upload')
     uploader = CloudUploader()
     
     # Example usage
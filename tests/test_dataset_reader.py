@@ -0,0 +1,105 @@
+import unittest
+import os
+import json
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from python_src.create_datasets import DatasetCreator
+from python_src.dataset_reader import DatasetReader
+
+
+class TestDatasetReader(unittest.TestCase):
+    def setUp(self):
+        """Write raw listings, including awkward descriptions"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.raw_items = [
+            {
+                "id": i,
+                "title": f"Product {i}",
+                "price": 10.0 + i,
+                "description": "Line one\nLine \"two\", with comma – ünïcode" if i % 3 == 0 else "Plain"
+            }
+            for i in range(25)
+        ]
+        self.input_file = self.test_dir / "data.json"
+        with open(self.input_file, "w") as f:
+            json.dump(self.raw_items, f)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def create(self, format):
+        creator = DatasetCreator(input_path=str(self.test_dir),
+                                 output_path=str(self.test_dir),
+                                 format=format, batch_size=10)
+        output_file = self.test_dir / f"dataset.{format}"
+        creator.create_dataset(self.input_file, output_file)
+        return output_file
+
+    def test_formats(self):
+        """Every output format supports indexed, sliced and projected access"""
+        for format in ("json", "jsonl", "csv", "parquet"):
+            with self.subTest(format=format):
+                output_file = self.create(format)
+                if format != "parquet":
+                    self.assertTrue(DatasetReader.index_path(output_file).exists())
+
+                with DatasetReader(str(output_file)) as reader:
+                    self.assertEqual(len(reader), 25)
+                    self.assertEqual(reader[3]["description"], self.raw_items[3]["description"])
+                    self.assertEqual(reader[-1]["title"], "Product 24")
+                    self.assertEqual([r["title"] for r in reader[10:13]],
+                                     ["Product 10", "Product 11", "Product 12"])
+                    self.assertEqual(reader.get(21)["title"], "Product 21")
+                    self.assertIsNone(reader.get(99))
+                    self.assertEqual(list(reader.iter(0, 2, columns=["title"])),
+                                     [{"title": "Product 0"}, {"title": "Product 1"}])
+
+    def test_index_is_memory_mapped(self):
+        """Offsets and ids are mmapped from .npy files; no temporary files remain"""
+        output_file = self.create("csv")
+
+        with DatasetReader(str(output_file)) as reader:
+            self.assertIsInstance(reader._offsets, np.memmap)
+            self.assertIsInstance(reader._ids, np.memmap)
+            self.assertEqual(reader._ids.dtype["id"].kind, "S")
+            self.assertEqual(reader.get("7")["title"], "Product 7")
+
+        self.assertEqual(sorted(p.name for p in self.test_dir.glob("dataset.csv.*")),
+                         ["dataset.csv.ids.npy", "dataset.csv.idx.json", "dataset.csv.idx.npy"])
+
+    def test_stale_index_is_rebuilt(self):
+        """An index that no longer matches the file is rebuilt on open"""
+        output_file = self.create("jsonl")
+        with open(output_file, "a") as f:
+            f.write(json.dumps({"id": 100, "title": "Appended"}) + "\n")
+
+        with DatasetReader(str(output_file)) as reader:
+            self.assertEqual(len(reader), 26)
+            self.assertEqual(reader.get("100")["title"], "Appended")
+
+    def test_same_size_rewrite_is_rebuilt(self):
+        """A rewrite that keeps the file size still invalidates the index"""
+        output_file = self.create("jsonl")
+        DatasetReader(str(output_file)).close()
+
+        # Grow record 0 and shrink record 1 by one byte: same size, shifted boundary
+        content = output_file.read_bytes()
+        rewritten = content.replace(b'"Product 0"', b'"Product 0X"', 1)
+        rewritten = rewritten.replace(b'"Product 1"', b'"Product "', 1)
+        self.assertEqual(len(rewritten), len(content))
+        stat = output_file.stat()
+        output_file.write_bytes(rewritten)
+        # Force a distinct mtime even on coarse-grained filesystems
+        os.utime(output_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        with DatasetReader(str(output_file)) as reader:
+            self.assertEqual(reader[0]["title"], "Product 0X")
+            self.assertEqual(reader[1]["title"], "Product ")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
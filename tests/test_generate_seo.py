@@ -0,0 +1,145 @@
+import unittest
+import json
+import shutil
+import tempfile
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from python_src.config import config
+from python_src.generate_seo import SEOGenerator, DEFAULT_TEMPLATES
+
+
+class TestTemplateTier(unittest.TestCase):
+    def setUp(self):
+        """Stub the tokenizer and model so no weights are loaded"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.tokenizer = MagicMock()
+        self.tokenizer.decode.return_value = "model description"
+        self.model = MagicMock()
+
+        patches = [
+            patch('python_src.generate_seo.AutoTokenizer.from_pretrained',
+                  return_value=self.tokenizer),
+            patch('python_src.generate_seo.AutoModelForSeq2SeqLM.from_pretrained',
+                  return_value=self.model),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+        self.features = {"title": "Vintage Camera", "category": "cameras", "condition": "Used"}
+        self.keywords = ["camera", "vintage"]
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def make_generator(self, templates=None, min_score=60, categories=None, templates_file=None):
+        settings = {
+            'templates_file': templates_file,
+            'template_tier': {'enabled': True, 'min_score': min_score,
+                              'categories': categories or []},
+        }
+        with patch.dict(config._config['seo']['description'], settings):
+            generator = SEOGenerator()
+        if templates is not None:
+            generator.templates = templates
+        return generator
+
+    def test_template_accepted(self):
+        """A template at or above min_score is returned without calling the model"""
+        # Both keywords match and the text is short: 2 / (2 + 2) = 50
+        generator = self.make_generator(["{title} with {keywords}"], min_score=50)
+
+        description = generator.generate_description(self.features, self.keywords)
+
+        self.assertEqual(description, "Vintage Camera with camera, vintage")
+        self.model.generate.assert_not_called()
+        stats = generator.get_tier_stats()
+        self.assertEqual(stats['template']['count'], 1)
+        self.assertEqual(stats['model']['count'], 0)
+        self.assertEqual(stats['escalations'], 0)
+
+    def test_escalates_below_min_score(self):
+        """A template below min_score escalates to the model"""
+        generator = self.make_generator(["{title} with {keywords}"], min_score=50.01)
+
+        description = generator.generate_description(self.features, self.keywords)
+
+        self.assertEqual(description, "model description")
+        self.model.generate.assert_called_once()
+        stats = generator.get_tier_stats()
+        self.assertEqual(stats['template']['count'], 0)
+        self.assertEqual(stats['template_escalated']['count'], 1)
+        self.assertEqual(stats['model']['count'], 1)
+        self.assertEqual(stats['escalations'], 1)
+
+    def test_categories(self):
+        """Only listed categories use the template tier"""
+        generator = self.make_generator(["{title} with {keywords}"], min_score=0,
+                                        categories=["clothing"])
+
+        self.assertEqual(generator.generate_description(self.features, self.keywords),
+                         "model description")
+        jacket = {"title": "Leather Jacket", "category": "clothing"}
+        self.assertEqual(generator.generate_description(jacket, ["jacket"]),
+                         "Leather Jacket with jacket")
+
+        stats = generator.get_tier_stats()
+        # Skipping the tier is not an escalation
+        self.assertEqual(stats['escalations'], 0)
+        self.assertEqual(stats['template']['count'], 1)
+        self.assertEqual(stats['model']['count'], 1)
+
+    def test_templates_file_per_category(self):
+        """A templates file may map categories to templates, with a default"""
+        templates_file = self.test_dir / "templates.json"
+        templates_file.write_text(json.dumps({
+            "cameras": ["Camera: {title} {keywords}"],
+            "default": ["Item: {title} {keywords}"],
+        }))
+        generator = self.make_generator(min_score=0, templates_file=str(templates_file))
+
+        self.assertEqual(generator.generate_description(self.features, self.keywords),
+                         "Camera: Vintage Camera camera, vintage")
+        book = {"title": "Old Novel", "category": "books"}
+        self.assertEqual(generator.generate_description(book, ["novel"]),
+                         "Item: Old Novel novel")
+
+    def test_invalid_templates_file(self):
+        """A templates file that is not a list or dict falls back to the defaults"""
+        templates_file = self.test_dir / "templates.json"
+        templates_file.write_text(json.dumps("{title}"))
+        generator = self.make_generator(templates_file=str(templates_file))
+        self.assertEqual(generator.templates, DEFAULT_TEMPLATES)
+
+    def test_invalid_templates(self):
+        """Templates that fail to format are skipped; all invalid escalates"""
+        generator = self.make_generator(
+            ["{0}", "{title", "{title.missing}", 42, "{title} with {keywords}"], min_score=0)
+
+        best = generator.generate_template_description(self.features, self.keywords)
+        self.assertEqual(best['description'], "Vintage Camera with camera, vintage")
+
+        generator.templates = ["{0}", "{title"]
+        self.assertIsNone(generator.generate_template_description(self.features, self.keywords))
+        self.assertEqual(generator.generate_description(self.features, self.keywords),
+                         "model description")
+
+    def test_get_tier_stats(self):
+        """Stats report counts, mean latency and the escalated template cost"""
+        generator = self.make_generator(["{title} with {keywords}"], min_score=50)
+        generator.generate_description(self.features, self.keywords)
+        generator.template_min_score = 100
+        generator.generate_description(self.features, self.keywords)
+
+        stats = generator.get_tier_stats()
+        self.assertEqual(stats['min_score'], 100)
+        for tier in ('template', 'template_escalated', 'model'):
+            self.assertEqual(stats[tier]['count'], 1)
+            self.assertGreater(stats[tier]['total_seconds'], 0)
+            self.assertAlmostEqual(stats[tier]['avg_latency_ms'],
+                                   stats[tier]['total_seconds'] * 1000, places=2)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,104 @@
+import unittest
+import time
+import shutil
+import asyncio
+import sqlite3
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import gradio as gr
+
+from python_src.gradio_app import EbayDashboard
+
+
+class TestEbayDashboard(unittest.TestCase):
+    def setUp(self):
+        """Create a small items/analysis database"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.db_path = self.test_dir / "test.db"
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript("""
+            CREATE TABLE items (
+                id INTEGER PRIMARY KEY,
+                title TEXT,
+                price REAL,
+                category TEXT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE TABLE analysis (id INTEGER PRIMARY KEY, item_id INTEGER, quality_score REAL);
+        """)
+        conn.executemany("INSERT INTO items (id, title, price, category) VALUES (?, ?, ?, ?)", [
+            (1, "Vintage camera", 50.0, "cameras"),
+            (2, "Leather jacket", 120.0, "clothing"),
+        ])
+        conn.executemany("INSERT INTO analysis (item_id, quality_score) VALUES (?, ?)",
+                         [(1, 0.8), (2, 0.6)])
+        conn.commit()
+        conn.close()
+
+        self.dashboard = EbayDashboard(db_path=str(self.db_path), refresh_interval=0.05,
+                                       similarity_path=str(self.test_dir / "index"))
+
+    def tearDown(self):
+        self.dashboard.stop_background_refresh()
+        self.dashboard.conn.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_load_figure_is_cached(self):
+        """A tab's figure is computed once and then served from the cache"""
+        with patch.object(self.dashboard, "get_price_trends",
+                          wraps=self.dashboard.get_price_trends) as build:
+            first = asyncio.run(self.dashboard.load_figure("price_trends"))
+            second = asyncio.run(self.dashboard.load_figure("price_trends"))
+
+        self.assertEqual(build.call_count, 1)
+        self.assertIs(first, second)
+        self.assertEqual(list(self.dashboard._figures), ["price_trends"])
+
+    def test_commit_triggers_refresh(self):
+        """A commit from another connection recomputes loaded figures"""
+        asyncio.run(self.dashboard.load_figure("category_distribution"))
+        self.dashboard.start_background_refresh()
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            # Keep committing in case the refresher had not read data_version yet
+            for item_id in range(3, 13):
+                conn.execute("INSERT INTO items (id, title, price, category) VALUES (?, ?, ?, ?)",
+                             (item_id, "Gold watch", 900.0, "watches"))
+                conn.execute("INSERT INTO analysis (item_id, quality_score) VALUES (?, 0.9)",
+                             (item_id,))
+                conn.commit()
+                deadline = time.monotonic() + 0.5
+                while self.dashboard._figures_version == 0 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                if self.dashboard._figures_version:
+                    break
+        finally:
+            conn.close()
+
+        self.assertGreater(self.dashboard._figures_version, 0)
+        # Only loaded figures are refreshed
+        self.assertEqual(list(self.dashboard._figures), ["category_distribution"])
+        categories = self.dashboard._figures["category_distribution"].data[0].x
+        self.assertIn("watches", list(categories))
+
+    def test_poll_figures(self):
+        """Polling at the current version is a no-op; a stale version gets figures"""
+        figure = asyncio.run(self.dashboard.load_figure("price_trends"))
+
+        result = asyncio.run(self.dashboard.poll_figures(self.dashboard._figures_version))
+        self.assertEqual(result[0], self.dashboard._figures_version)
+        self.assertEqual(result[1:], [gr.update() for _ in EbayDashboard.FIGURES])
+
+        self.dashboard.refresh_figures()
+        result = asyncio.run(self.dashboard.poll_figures(0))
+        self.assertEqual(result[0], 1)
+        names = list(EbayDashboard.FIGURES)
+        self.assertIsNot(result[1 + names.index("price_trends")], figure)
+        self.assertEqual(result[1 + names.index("quality_analysis")], gr.update())
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,65 @@
+import unittest
+import shutil
+import tarfile
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from python_src.image_text_dataset import INDEX_DTYPE, ShardedDatasetWriter, ShardedDatasetReader
+
+
+class TestShardedDataset(unittest.TestCase):
+    def setUp(self):
+        """Create fake image files of varying sizes"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.image_dir = self.test_dir / "images"
+        self.image_dir.mkdir()
+
+        self.image_paths = []
+        self.texts = []
+        for i in range(10):
+            image_path = self.image_dir / f"item_{i}.jpg"
+            image_path.write_bytes(bytes([i]) * (1000 + 137 * i))
+            self.image_paths.append(str(image_path))
+            self.texts.append(f"Description for item {i} – café")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_write_and_random_access(self):
+        """Shards respect the size bound and samples round-trip via mmap"""
+        output_dir = self.test_dir / "dataset"
+        writer = ShardedDatasetWriter(str(output_dir), max_shard_bytes=4000, max_workers=3)
+        manifest = writer.write(self.image_paths + ["/missing.jpg"], self.texts + ["missing"])
+
+        self.assertEqual(manifest['count'], 10)
+        self.assertGreater(len(manifest['shards']), 1)
+
+        reader = ShardedDatasetReader(str(output_dir))
+        try:
+            self.assertEqual(len(reader), 10)
+            for i in (0, 4, 9, -1):
+                sample = reader[i]
+                expected = i % 10
+                self.assertEqual(sample['image'], Path(self.image_paths[expected]).read_bytes())
+                self.assertEqual(sample['text'], self.texts[expected])
+                self.assertEqual(sample['image_path'], self.image_paths[expected])
+                self.assertEqual(sample['key'], f"{expected:09d}")
+            with self.assertRaises(IndexError):
+                reader[10]
+        finally:
+            reader.close()
+
+        # Offsets are a fixed-width array, not per-sample JSON
+        index = np.load(output_dir / manifest['shards'][0]['index'])
+        self.assertEqual(index.dtype, INDEX_DTYPE)
+        self.assertEqual(len(index), manifest['shards'][0]['count'])
+
+        # Shards remain readable as plain tar archives
+        with tarfile.open(output_dir / manifest['shards'][0]['tar']) as tar:
+            self.assertEqual(tar.getnames()[:2], ["000000000.jpg", "000000000.txt"])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
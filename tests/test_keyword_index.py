@@ -0,0 +1,186 @@
+import unittest
+import json
+import shutil
+import sqlite3
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+from python_src.keyword_index import KeywordIndex
+
+
+class TestKeywordIndex(unittest.TestCase):
+    def setUp(self):
+        """Create a small seo table"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.db_path = self.test_dir / "test.db"
+
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("""
+            CREATE TABLE seo (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                item_id INTEGER,
+                description TEXT,
+                keywords TEXT,
+                metadata TEXT
+            )
+        """)
+        rows = [
+            (["vintage", "camera", "film", "ebay"], "cameras"),
+            (["vintage", "lens", "camera", "ebay"], "cameras"),
+            (["leather", "jacket", "vintage", "ebay"], "clothing"),
+            (["jacket", "denim", "ebay"], "clothing"),
+        ]
+        for keywords, category in rows:
+            self.insert_row(conn, keywords, category)
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    @staticmethod
+    def insert_row(conn, keywords, category):
+        conn.execute(
+            "INSERT INTO seo (item_id, description, keywords, metadata) VALUES (?, ?, ?, ?)",
+            (1, "", json.dumps(keywords), json.dumps({"category": category}))
+        )
+
+    def test_incremental_update(self):
+        """Only new rows are consumed on subsequent updates"""
+        index = KeywordIndex(db_path=str(self.db_path), batch_size=3)
+        self.assertEqual(index.update(), 4)
+        self.assertEqual(index.update(), 0)
+        self.assertEqual(index.doc_count, 4)
+        self.assertEqual(index.doc_freq[index.vocab["ebay"]], 4)
+
+        conn = sqlite3.connect(self.db_path)
+        self.insert_row(conn, ["film", "camera"], "cameras")
+        conn.commit()
+        conn.close()
+
+        self.assertEqual(index.update(), 1)
+        camera, film = index.vocab["camera"], index.vocab["film"]
+        self.assertEqual(index.cooccurrence[camera, film], 2)
+        self.assertEqual(index.cooccurrence[camera, camera], 0)
+
+    def test_rank_keywords(self):
+        """Distinctive in-category keywords outrank catalog-wide filler"""
+        index = KeywordIndex(db_path=str(self.db_path))
+        index.update()
+
+        features = {"title": "Vintage film camera", "category": "cameras"}
+        ranked = index.rank_keywords(features, ["ebay", "jacket", "camera", "brand-new"])
+
+        self.assertEqual(ranked[0], "camera")
+        self.assertLess(ranked.index("camera"), ranked.index("ebay"))
+        self.assertEqual(ranked[-1], "brand-new")
+
+    def test_batched_merge_matches_single_pass(self):
+        """Merging collected batches gives the same statistics as one batch"""
+        batched = KeywordIndex(db_path=str(self.db_path), batch_size=1, merge_threshold=3)
+        single = KeywordIndex(db_path=str(self.db_path), batch_size=100)
+        self.assertEqual(batched.update(), 4)
+        single.update()
+
+        self.assertEqual(batched.last_seo_id, single.last_seo_id)
+        self.assertEqual(batched.doc_freq.tolist(), single.doc_freq.tolist())
+        self.assertEqual((batched.cooccurrence != single.cooccurrence).nnz, 0)
+        self.assertEqual((batched.category_counts != single.category_counts).nnz, 0)
+
+    def test_phrase_context(self):
+        """Multi-word keywords in the title count as co-occurrence context"""
+        index = KeywordIndex(db_path=str(self.db_path))
+        index.add_documents([
+            {"keywords": ["film camera", "35mm"], "category": "cameras"},
+            {"keywords": ["lens"], "category": "cameras"},
+            {"keywords": ["lens"], "category": "cameras"},
+        ])
+
+        context = index._feature_terms({"title": "Vintage Film-Camera body"})
+        self.assertIn(index.vocab["film camera"], context)
+
+        # Without the phrase as context "lens" wins on category frequency
+        ranked = index.rank_keywords({"title": "Other", "category": "cameras"},
+                                     ["lens", "35mm"])
+        self.assertEqual(ranked[0], "lens")
+        ranked = index.rank_keywords({"title": "Film camera", "category": "cameras"},
+                                     ["lens", "35mm"])
+        self.assertEqual(ranked[0], "35mm")
+
+    def test_failed_update_leaves_index_consistent(self):
+        """A batch that fails mid-update adds nothing, not even vocabulary"""
+        index = KeywordIndex(db_path=str(self.db_path), batch_size=2)
+        index.add_documents([{"keywords": ["a", "b"], "category": "x"}])
+        vocab = dict(index.vocab)
+
+        conn = sqlite3.connect(self.db_path)
+        self.insert_row(conn, ["c", "a"], "y")
+        conn.commit()
+        conn.close()
+
+        original = index._accumulate
+        calls = []
+
+        def fail_second_batch(documents, pending):
+            calls.append(len(documents))
+            original(documents, pending)
+            if len(calls) == 2:
+                raise RuntimeError("interrupted")
+
+        with patch.object(index, "_accumulate", side_effect=fail_second_batch):
+            with self.assertRaises(RuntimeError):
+                index.update()
+
+        self.assertEqual(index.vocab, vocab)
+        self.assertEqual(index.categories, {"x": 0})
+        self.assertEqual(index.last_seo_id, 0)
+        self.assertEqual(index.rank_keywords({"title": "a"}, ["c", "a"]), ["a", "c"])
+
+        # The next update starts from the same place and succeeds
+        self.assertEqual(index.update(), 5)
+        self.assertEqual(len(index.doc_freq), len(index.vocab))
+
+    def test_rank_scores_only_candidates(self):
+        """IDF and TF-IDF for a subset match the full-vocabulary values"""
+        index = KeywordIndex(db_path=str(self.db_path))
+        index.update()
+        ids = np.array([index.vocab["camera"], index.vocab["ebay"]])
+        np.testing.assert_allclose(index.idf(ids), index.idf()[ids])
+        np.testing.assert_allclose(index.category_tfidf("cameras", ids),
+                                   index.category_tfidf("cameras")[ids])
+
+    def test_save_and_load(self):
+        """A saved index resumes from where it stopped"""
+        index = KeywordIndex(db_path=str(self.db_path))
+        index.update()
+        index.save(str(self.test_dir / "index"))
+
+        loaded = KeywordIndex.load(str(self.test_dir / "index"), db_path=str(self.db_path))
+        self.assertEqual(loaded.update(), 0)
+        self.assertEqual(loaded.vocab, index.vocab)
+        self.assertEqual((loaded.cooccurrence != index.cooccurrence).nnz, 0)
+
+    def test_load_trims_newer_arrays(self):
+        """Arrays written after state.json are trimmed to the loaded vocabulary"""
+        index = KeywordIndex(db_path=str(self.db_path))
+        index.update()
+        path = self.test_dir / "index"
+        index.save(str(path))
+        state = (path / "state.json").read_text()
+
+        index.add_documents([{"keywords": ["brand new term"], "category": "new"}])
+        index.save(str(path))
+        (path / "state.json").write_text(state)
+
+        loaded = KeywordIndex.load(str(path), db_path=str(self.db_path))
+        self.assertEqual(len(loaded.doc_freq), len(loaded.vocab))
+        self.assertEqual(loaded.cooccurrence.shape, (len(loaded.vocab),) * 2)
+        self.assertEqual(loaded.category_counts.shape,
+                         (len(loaded.categories), len(loaded.vocab)))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
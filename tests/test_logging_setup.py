@@ -0,0 +1,107 @@
+import unittest
+import json
+import queue
+import shutil
+import logging
+import tempfile
+from pathlib import Path
+
+from python_src import logging_setup
+from python_src.logging_setup import (DroppingQueueHandler, RateLimitFilter, parse_size,
+                                      setup_logging, shutdown_logging)
+
+
+class TestLoggingSetup(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.log_file = self.test_dir / "app.log"
+
+    def tearDown(self):
+        shutdown_logging()
+        shutil.rmtree(self.test_dir)
+
+    def read_entries(self):
+        shutdown_logging()
+        with open(self.log_file) as f:
+            return [json.loads(line) for line in f]
+
+    def test_json_output_with_stage(self):
+        """Records are written as JSON lines tagged with their stage"""
+        setup_logging(stage="dataset_creation", level="INFO", log_file=str(self.log_file),
+                      console=False)
+        logger = logging.getLogger("test_logging_setup")
+        logger.info("Dataset created", extra={"rows": 3})
+        logger.info("Image done", extra={"stage": "image_processing"})
+        logger.debug("Not emitted")
+
+        entries = self.read_entries()
+        self.assertEqual(len(entries), 2)
+        self.assertEqual(entries[0]["message"], "Dataset created")
+        self.assertEqual(entries[0]["stage"], "dataset_creation")
+        self.assertEqual(entries[0]["rows"], 3)
+        self.assertEqual(entries[1]["stage"], "image_processing")
+
+    def test_exception_is_kept(self):
+        """Tracebacks land in the `exception` field, not in the message"""
+        setup_logging(stage="test", log_file=str(self.log_file), console=False)
+        try:
+            raise ValueError("bad row")
+        except ValueError:
+            logging.getLogger("test_logging_setup").exception("Row %d failed", 7)
+
+        entry = self.read_entries()[0]
+        self.assertEqual(entry["message"], "Row 7 failed")
+        self.assertIn("ValueError: bad row", entry["exception"])
+
+    def test_file_per_stage(self):
+        """A `{stage}` placeholder gives each stage its own file"""
+        pattern = str(self.test_dir / "{stage}.log")
+        setup_logging(stage="dashboard", log_file=pattern, console=False)
+        logging.getLogger("test_logging_setup").warning("hello")
+        shutdown_logging()
+        self.assertTrue((self.test_dir / "dashboard.log").exists())
+
+    def test_losses_are_reported(self):
+        """Suppressed and dropped counts are logged at shutdown"""
+        setup_logging(stage="test", level="INFO", log_file=str(self.log_file), console=False)
+        rate_filter = next(f for f in logging_setup._queue_handler.filters
+                           if isinstance(f, RateLimitFilter))
+        rate_filter.rate_limits = {"default": 1}
+        logger = logging.getLogger("test_logging_setup")
+        for _ in range(5):
+            logger.info("tick")
+        logging_setup._queue_handler.dropped = 2
+
+        entries = self.read_entries()
+        self.assertEqual([e["message"] for e in entries[:1]], ["tick"])
+        summaries = {e["message"].split()[0]: e for e in entries[1:]}
+        self.assertEqual(summaries["Suppressed"]["suppressed"], 4)
+        self.assertEqual(summaries["Dropped"]["dropped"], 2)
+
+    def test_full_queue_drops(self):
+        """A full queue drops records instead of blocking the caller"""
+        handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+        for _ in range(3):
+            handler.emit(logging.LogRecord("test", logging.INFO, __file__, 1, "msg", None, None))
+        self.assertEqual(handler.dropped, 2)
+
+    def test_rate_limit_per_call_site(self):
+        """High-frequency messages are throttled; warnings never are"""
+        rate_filter = RateLimitFilter({"default": 5})
+
+        def record(level, lineno):
+            return logging.LogRecord("test", level, __file__, lineno, "msg", None, None)
+
+        passed = sum(rate_filter.filter(record(logging.INFO, 1)) for _ in range(100))
+        self.assertEqual(passed, 5)
+        self.assertTrue(rate_filter.filter(record(logging.INFO, 2)))
+        self.assertTrue(all(rate_filter.filter(record(logging.WARNING, 1)) for _ in range(10)))
+
+    def test_parse_size(self):
+        self.assertEqual(parse_size("100MB"), 100 * 1024 * 1024)
+        self.assertEqual(parse_size("512KB"), 512 * 1024)
+        self.assertEqual(parse_size(2048), 2048)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
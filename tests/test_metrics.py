@@ -0,0 +1,122 @@
+import unittest
+import os
+import sys
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+
+from python_src.metrics import Metrics
+from python_src.metrics_exporter import compact_textfiles, merge_textfiles
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.metrics = Metrics()
+        self.metrics.configure(enabled=True, metrics_dir=str(self.test_dir),
+                               dump_interval=3600, profile_stages=set(),
+                               process_name="test")
+
+    def tearDown(self):
+        self.metrics.configure(enabled=False, metrics_dir=str(self.test_dir))
+        shutil.rmtree(self.test_dir)
+
+    def test_disabled_records_nothing(self):
+        """A disabled registry ignores timers, decorators and counters"""
+        self.metrics.configure(enabled=False, metrics_dir=str(self.test_dir))
+
+        @self.metrics.timed("stage")
+        def work():
+            return 42
+
+        self.assertEqual(work(), 42)
+        with self.metrics.timer("stage"):
+            pass
+        self.metrics.inc("items_processed_total", stage="stage")
+        self.assertEqual(self.metrics.render(), "")
+
+    def test_render_prometheus_text(self):
+        """Counters and stage histograms render in exposition format"""
+        @self.metrics.timed("seo")
+        def work():
+            return "done"
+
+        work()
+        with self.assertRaises(RuntimeError):
+            with self.metrics.timer("seo"):
+                raise RuntimeError("boom")
+        self.metrics.inc("bytes_processed_total", 128, stage="upload")
+
+        text = self.metrics.render()
+        self.assertIn('# TYPE bytes_processed_total counter', text)
+        self.assertIn('bytes_processed_total{stage="upload"} 128', text)
+        self.assertIn('stage_errors_total{stage="seo"} 1', text)
+        self.assertIn('stage_duration_seconds_bucket{stage="seo",le="+Inf"} 2', text)
+        self.assertIn('stage_duration_seconds_count{stage="seo"} 2', text)
+
+    def test_profile_dump(self):
+        """Opted-in stages dump cProfile and tracemalloc snapshots"""
+        self.metrics.configure(enabled=True, metrics_dir=str(self.test_dir),
+                               profile_stages={"hot"}, profile_sample_rate=1.0,
+                               profile_dir=str(self.test_dir / "profiles"))
+        with self.metrics.timer("hot"):
+            sum(range(1000))
+        with self.metrics.timer("cold"):
+            sum(range(1000))
+
+        files = sorted(p.suffix for p in (self.test_dir / "profiles").iterdir())
+        self.assertEqual(files, [".prof", ".tracemalloc"])
+
+    def test_exporter_merges_processes(self):
+        """Textfiles are summed per process name, not per pid"""
+        self.metrics.inc("items_processed_total", 3, stage="dataset_creation")
+        self.metrics.write_textfile()
+        for pid, value in ((1, 5), (2, 2.5)):
+            (self.test_dir / f"other-{pid}.prom").write_text(
+                "# HELP items_processed_total Items\n"
+                "# TYPE items_processed_total counter\n"
+                f'items_processed_total{{stage="seo"}} {value}\n'
+            )
+
+        merged = merge_textfiles(self.test_dir)
+        self.assertEqual(merged.count("# TYPE items_processed_total counter"), 1)
+        self.assertIn('items_processed_total{stage="seo",process="other"} 7.5', merged)
+        self.assertIn('items_processed_total{stage="dataset_creation",process="test"} 3', merged)
+
+    def test_exporter_keeps_first_help_per_family(self):
+        """Differing HELP text across files still yields one HELP and one TYPE"""
+        for name, help_text in (("a-1", "First"), ("b-2", "Second")):
+            (self.test_dir / f"{name}.prom").write_text(
+                f"# HELP a_total {help_text}\n"
+                "# TYPE a_total counter\n"
+                "a_total 1\n"
+            )
+
+        lines = merge_textfiles(self.test_dir).splitlines()
+        self.assertEqual(lines[:2], ["# HELP a_total First", "# TYPE a_total counter"])
+        self.assertEqual(sum(line.startswith("# ") for line in lines), 2)
+
+    def test_exporter_compacts_dead_processes(self):
+        """Files of exited processes fold into one archive with the same totals"""
+        process = subprocess.Popen([sys.executable, "-c", "pass"])
+        process.wait()
+        dead = process.pid
+        for pid in (dead, os.getpid()):
+            (self.test_dir / f"upload-{pid}.prom").write_text(
+                "# HELP bytes_processed_total Bytes\n"
+                "# TYPE bytes_processed_total counter\n"
+                'bytes_processed_total{stage="upload"} 10\n'
+            )
+        before = merge_textfiles(self.test_dir)
+
+        self.assertEqual(compact_textfiles(self.test_dir), 1)
+        self.assertEqual(compact_textfiles(self.test_dir), 0)
+        self.assertFalse((self.test_dir / f"upload-{dead}.prom").exists())
+        self.assertTrue((self.test_dir / "upload.archive.prom").exists())
+        self.assertEqual(merge_textfiles(self.test_dir), before)
+        self.assertIn('bytes_processed_total{stage="upload",process="upload"} 20', before)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
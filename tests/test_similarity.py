@@ -0,0 +1,166 @@
+import unittest
+import shutil
+import sqlite3
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from python_src.similarity import VectorStore, SimilarListingIndex
+
+
+def bag_of_words_encoder(texts):
+    """Deterministic stand-in for the t5 encoder"""
+    vocab = ["camera", "lens", "film", "jacket", "leather", "denim", "watch", "gold"]
+    vectors = np.zeros((len(texts), len(vocab)), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in text.lower().split():
+            if word in vocab:
+                vectors[row, vocab.index(word)] += 1
+    return vectors + 0.01
+
+
+class TestVectorStore(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_ivf_search_and_reload(self):
+        """IVF search finds the nearest neighbour and survives a reload"""
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(800, 16)).astype(np.float32)
+
+        store = VectorStore(str(self.test_dir / "index"), dim=16, nlist=8, nprobe=8,
+                            initial_capacity=4)
+        for start in range(0, 400, 100):
+            store.add(list(range(start + 1, start + 101)), vectors[start:start + 100])
+        # Adding never trains; the writer decides when to
+        self.assertIsNone(store.centroids)
+        self.assertTrue(store.needs_training())
+        store.train()
+        self.assertFalse(store.needs_training())
+        for start in range(400, 800, 100):
+            store.add(list(range(start + 1, start + 101)), vectors[start:start + 100])
+        # Catalog doubled since training, so the centroids are due a refit
+        self.assertTrue(store.needs_training())
+        store.flush()
+
+        # Probing every list makes IVF exact
+        results = store.search(vectors[42], k=3)
+        self.assertEqual(results[0]['item_id'], 43)
+
+        reloaded = VectorStore(str(self.test_dir / "index"), dim=16)
+        self.assertEqual(len(reloaded), 800)
+        self.assertIn(800, reloaded)
+        self.assertEqual(reloaded.search(vectors[42], k=1)[0]['item_id'], 43)
+        self.assertEqual(reloaded.trained_count, 400)
+
+    def test_chunked_exact_search(self):
+        """Exact search over several chunks matches a full scan"""
+        rng = np.random.default_rng(1)
+        vectors = rng.normal(size=(100, 8)).astype(np.float32)
+        store = VectorStore(str(self.test_dir / "index"), dim=8, search_chunk=7)
+        store.add(list(range(100)), vectors)
+
+        query = rng.normal(size=8)
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        expected = np.argsort(-(normalized @ query))[:5].tolist()
+        self.assertEqual([r['item_id'] for r in store.search(query, k=5)], expected)
+
+    def test_train_small_catalog(self):
+        """Training with fewer vectors than nlist uses fewer lists"""
+        rng = np.random.default_rng(2)
+        store = VectorStore(str(self.test_dir / "index"), dim=8)
+        store.add(list(range(100)), rng.normal(size=(100, 8)))
+        store.train()
+        self.assertEqual(len(store.centroids), 2)
+        self.assertEqual(len(store.search(rng.normal(size=8), k=3)), 3)
+
+    def test_read_only_reload(self):
+        """A read-only store picks up the writer's flushes and rejects writes"""
+        vectors = np.eye(4, dtype=np.float32)
+        with self.assertRaises(FileNotFoundError):
+            VectorStore(str(self.test_dir / "index"), dim=4, read_only=True)
+
+        writer = VectorStore(str(self.test_dir / "index"), dim=4, initial_capacity=2)
+        writer.add([1, 2], vectors[:2])
+        writer.flush()
+
+        reader = VectorStore(str(self.test_dir / "index"), dim=4, read_only=True)
+        self.assertFalse(reader.reload_if_changed())
+        with self.assertRaises(PermissionError):
+            reader.add([9], vectors[:1])
+
+        writer.add([3, 4], vectors[2:])
+        writer.flush()
+        self.assertTrue(reader.reload_if_changed())
+        self.assertEqual(len(reader), 4)
+        self.assertEqual(reader.search(vectors[3], k=1)[0]['item_id'], 4)
+
+
+class TestSimilarListingIndex(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.db_path = self.test_dir / "test.db"
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript("""
+            CREATE TABLE items (id INTEGER PRIMARY KEY, title TEXT, price REAL);
+            CREATE TABLE seo (id INTEGER PRIMARY KEY, item_id INTEGER, description TEXT);
+        """)
+        conn.executemany("INSERT INTO items (id, title, price) VALUES (?, ?, ?)", [
+            (1, "Vintage film camera", 50.0),
+            (2, "Camera lens", 80.0),
+            (3, "Leather jacket", 120.0),
+            (4, "Denim jacket", 60.0),
+        ])
+        conn.execute("INSERT INTO seo (item_id, description) VALUES (4, 'classic denim')")
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_similar(self):
+        """Similar listings exclude the item itself and update incrementally"""
+        index = SimilarListingIndex(db_path=str(self.db_path),
+                                    index_path=str(self.test_dir / "index"),
+                                    encoder=bag_of_words_encoder, dim=8)
+        self.assertEqual(index.update(), 4)
+        self.assertEqual(index.update(), 0)
+
+        results = index.similar(3, k=2)
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0]['item_id'], 4)
+
+        with self.assertRaises(KeyError):
+            index.similar(99)
+
+    def test_read_only_similar(self):
+        """Read-only queries never embed; they see items once the writer runs"""
+        index_path = str(self.test_dir / "index")
+        writer = SimilarListingIndex(db_path=str(self.db_path), index_path=index_path,
+                                     encoder=bag_of_words_encoder, dim=8)
+        writer.update()
+
+        def fail(texts):
+            raise AssertionError("read-only index must not embed")
+
+        reader = SimilarListingIndex(db_path=str(self.db_path), index_path=index_path,
+                                     encoder=fail, dim=8, read_only=True)
+        self.assertEqual(reader.similar(1, k=1)[0]['item_id'], 2)
+
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("INSERT INTO items (id, title, price) VALUES (5, 'Gold watch', 900.0)")
+        conn.commit()
+        conn.close()
+        with self.assertRaises(KeyError):
+            reader.similar(5)
+
+        writer.update()
+        self.assertEqual(len(reader.similar(5, k=2)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)